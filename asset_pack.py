@@ -0,0 +1,217 @@
+"""资源包：把所有精灵帧按目标尺寸预先缩放，打包成一张原始像素图集 + 索引
+
+用法: python asset_pack.py [--force]
+
+游戏启动时先调用 load_current_pack()：资源包与源图片一致时直接把打包文件映射到内存，
+不再解码PNG、不再缩放；源图片的修改时间或目标尺寸变化时，游戏在后台线程重新打包（build_pack）。
+"""
+import argparse
+import json
+import mmap
+import os
+
+import pygame
+
+from assets import asset_path, entry_files, list_image_files
+from config import ROOT
+
+PACK_VERSION = 1
+PACK_DIR = os.path.join(ROOT, "asset_cache")
+PACK_FILE = "assets.pack"
+INDEX_FILE = "assets.json"
+ATLAS_WIDTH = 1024
+
+
+def source_signature(manifest):
+    # 记录每个源文件的修改时间和大小，任何一项变化都需要重新打包
+    signature = {}
+    for entry in manifest:
+        for path in entry_files(entry):
+            stat = os.stat(asset_path(path))
+            signature[path] = [stat.st_mtime_ns, stat.st_size]
+    return signature
+
+
+def manifest_key(entry):
+    # 清单条目转换成JSON友好的键
+    kind, path, size = entry[0], entry[1], entry[2]
+    if kind == "frames":
+        return ["frames", path, list(size)]
+    return ["image", path, list(size), bool(entry[3])]
+
+
+def load_scaled(path, size):
+    return pygame.transform.scale(pygame.image.load(asset_path(path)), size)
+
+
+def shelf_pack(sizes, width):
+    """简单的货架式装箱：按高度从高到低逐行排放，返回各矩形位置和图集尺寸"""
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i][1])
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for i in order:
+        w, h = sizes[i]
+        if x + w > width:
+            x = 0
+            y += shelf_height
+            shelf_height = 0
+        positions[i] = (x, y)
+        x += w
+        shelf_height = max(shelf_height, h)
+    return positions, (width, y + shelf_height)
+
+
+def build_pack(manifest, pack_dir=PACK_DIR):
+    """解码并缩放清单里的所有图片，写出打包文件和索引"""
+    # 带透明通道的图片（动画帧、宝箱）进同一张图集，不透明的大图（背景）单独存放
+    sprites = []  # (manifest_index, frame_index, Surface)
+    opaque = []  # (manifest_index, Surface)
+    for i, entry in enumerate(manifest):
+        kind, path, size = entry[0], entry[1], tuple(entry[2])
+        if kind == "frames":
+            for j, file_path in enumerate(list_image_files(path)):
+                sprites.append((i, j, load_scaled(file_path, size)))
+        elif os.path.exists(asset_path(path)):
+            surface = load_scaled(path, size)
+            if entry[3]:
+                sprites.append((i, 0, surface))
+            else:
+                opaque.append((i, surface))
+
+    positions, atlas_size = shelf_pack([surface.get_size() for _, _, surface in sprites], ATLAS_WIDTH)
+    atlas = pygame.Surface(atlas_size, pygame.SRCALPHA, 32)
+    entries = [{"key": manifest_key(entry), "rects": []} for entry in manifest]
+    for (i, j, surface), (x, y) in zip(sprites, positions):
+        # 图集初始全透明，用MAX混合原样拷贝像素（普通blit会按alpha混合半透明边缘）
+        atlas.blit(surface.convert(atlas), (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+        rects = entries[i]["rects"]
+        rects.extend([None] * (j + 1 - len(rects)))
+        rects[j] = [x, y, surface.get_width(), surface.get_height()]
+
+    os.makedirs(pack_dir, exist_ok=True)
+    index_path = os.path.join(pack_dir, INDEX_FILE)
+    if os.path.exists(index_path):
+        os.remove(index_path)  # 旧索引先删除，打包文件写到一半时不会被当成有效的包
+    blobs = [pygame.image.tobytes(atlas, "RGBA")]
+    offset = len(blobs[0])
+    for i, surface in opaque:
+        data = pygame.image.tobytes(surface, "RGB")
+        entries[i]["blob"] = {"offset": offset, "size": list(surface.get_size()), "format": "RGB"}
+        blobs.append(data)
+        offset += len(data)
+
+    with open(os.path.join(pack_dir, PACK_FILE), "wb") as f:
+        for data in blobs:
+            f.write(data)
+    index = {
+        "version": PACK_VERSION,
+        "sources": source_signature(manifest),
+        "atlas": {"offset": 0, "size": list(atlas_size), "format": "RGBA"},
+        "entries": entries,
+    }
+    # 索引最后写入：打包中途失败时下次启动会重新打包
+    with open(index_path, "w") as f:
+        json.dump(index, f)
+    return index
+
+
+def pack_is_current(index, manifest):
+    return (index.get("version") == PACK_VERSION
+            and index.get("sources") == source_signature(manifest)
+            and [entry["key"] for entry in index.get("entries", [])] == [manifest_key(e) for e in manifest])
+
+
+# 已加载的资源包：按清单键提供帧列表和单张图片
+class AssetPack:
+    def __init__(self, index, buffer):
+        self.buffer = buffer  # 内存映射的打包文件，无界面时表面直接引用其中的像素
+        self.frames = {}
+        self.images = {}
+        self.atlas = None
+        self.atlas_used = 0  # 图集中被精灵占用的像素数
+        self.bytes_held = 0  # 图集之外的图片占用的字节数
+
+        view = memoryview(buffer)
+        atlas_info = index["atlas"]
+        width, height = atlas_info["size"]
+        atlas = None
+        if width and height:
+            atlas = pygame.image.frombuffer(view[:width * height * 4], (width, height), "RGBA")
+            atlas = self.atlas = convert_surface(atlas, True)
+
+        for entry in index["entries"]:
+            key = entry["key"]
+            self.atlas_used += sum(rect[2] * rect[3] for rect in entry["rects"])
+            if key[0] == "frames":
+                frames = [atlas.subsurface(rect) for rect in entry["rects"]]
+                self.frames[(key[1], tuple(key[2]))] = frames
+            elif "blob" in entry:
+                blob = entry["blob"]
+                w, h = blob["size"]
+                start = blob["offset"]
+                surface = pygame.image.frombuffer(view[start:start + w * h * 3], (w, h), "RGB")
+                surface = convert_surface(surface, False)
+                self.bytes_held += surface.get_pitch() * surface.get_height()
+                self.images[(key[1], tuple(key[2]), key[3])] = surface
+            elif entry["rects"]:
+                self.images[(key[1], tuple(key[2]), key[3])] = atlas.subsurface(entry["rects"][0])
+
+
+def convert_surface(surface, alpha):
+    # 有显示窗口时转换为显示格式（一次内存拷贝），否则直接使用映射的像素
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha() if alpha else surface.convert()
+
+
+def load_pack(pack_dir=PACK_DIR):
+    with open(os.path.join(pack_dir, INDEX_FILE)) as f:
+        index = json.load(f)
+    with open(os.path.join(pack_dir, PACK_FILE), "rb") as f:
+        # ACCESS_COPY：写时复制映射，pygame.image.frombuffer 需要可写缓冲区
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    return AssetPack(index, buffer)
+
+
+def load_current_pack(manifest, pack_dir=PACK_DIR):
+    """资源包存在且与源图片一致时加载它，否则返回None（不重新打包）"""
+    try:
+        with open(os.path.join(pack_dir, INDEX_FILE)) as f:
+            index = json.load(f)
+        if not pack_is_current(index, manifest):
+            return None
+        return load_pack(pack_dir)
+    except (OSError, ValueError, KeyError, pygame.error):
+        return None
+
+
+def load_or_build_pack(manifest, pack_dir=PACK_DIR, force=False):
+    """加载资源包；不存在、源图片有变化或清单变化时先重新打包。失败时返回None（退回逐个加载图片）"""
+    pack = None if force else load_current_pack(manifest, pack_dir)
+    if pack is not None:
+        return pack
+    try:
+        build_pack(manifest, pack_dir)
+        return load_pack(pack_dir)
+    except (OSError, ValueError, KeyError, pygame.error) as e:
+        print(f"Cannot use asset pack: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the pre-scaled sprite asset pack")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the pack is up to date")
+    args = parser.parse_args()
+
+    from game_core import ASSET_MANIFEST
+
+    pygame.init()
+    pack = load_or_build_pack(ASSET_MANIFEST, force=args.force)
+    if pack is not None:
+        atlas_bytes = pack.atlas.get_pitch() * pack.atlas.get_height() if pack.atlas else 0
+        print(f"Asset pack ready: {len(pack.frames)} frame sets, {len(pack.images)} images, "
+              f"{(pack.bytes_held + atlas_bytes) // 1024} KB")
+
+
+if __name__ == "__main__":
+    main()
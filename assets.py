@@ -0,0 +1,343 @@
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from config import ROOT
+from render import scale_surface
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+ATLAS_PAGE_SIZE = (1024, 512)  # 本游戏全部带透明通道的精灵帧正好放进一页
+
+
+# 纹理图集：带透明通道的小图按行（货架式）依次排进大页面，返回页面的subsurface视图。
+# 页面一旦创建就不再重新分配，已经返回的subsurface始终有效
+class TextureAtlas:
+    def __init__(self, page_size=ATLAS_PAGE_SIZE):
+        self.page_size = page_size
+        self.pages = []
+        self.page = None  # 当前正在填充的页面
+        self.cursor = (0, 0, 0)  # 当前页面的 (x, y, 当前行高)
+        self.used_area = 0
+
+    def add(self, surface):
+        """把surface拷贝进图集，返回对应区域的subsurface；比页面还大时返回None"""
+        w, h = surface.get_size()
+        page_w, page_h = self.page_size
+        if w > page_w or h > page_h:
+            return None
+        x, y, shelf_height = self.cursor
+        if x + w > page_w:
+            x, y, shelf_height = 0, y + shelf_height, 0
+        if self.page is None or y + h > page_h:
+            self.page = convert_image(pygame.Surface(self.page_size, pygame.SRCALPHA, 32), True)
+            self.page.fill((0, 0, 0, 0))
+            self.pages.append(self.page)
+            x, y, shelf_height = 0, 0, 0
+        # 页面初始全透明，用MAX混合原样拷贝像素（普通blit会按alpha混合半透明边缘）
+        self.page.blit(surface, (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+        self.cursor = (x + w, y, max(shelf_height, h))
+        self.used_area += w * h
+        return self.page.subsurface((x, y, w, h))
+
+    def adopt(self, page, used_area):
+        """登记一张已经排好的页面（资源包里的图集），只参与统计，不再往里添加"""
+        self.pages.append(page)
+        self.used_area += used_area
+
+    def bytes_held(self):
+        return sum(surface_bytes(page) for page in self.pages)
+
+    def fill_ratio(self):
+        total = sum(page.get_width() * page.get_height() for page in self.pages)
+        return self.used_area / total if total else 0.0
+
+
+# 精灵缓存：同一个文件夹 + 目标尺寸只解码、缩放一次，所有实体共享同一份帧列表
+class SpriteCache:
+    def __init__(self):
+        self.frames = {}  # (folder_path, size) -> [Surface, ...]
+        self.images = {}  # (file_path, size, alpha) -> Surface 或 None
+        self.masks = {}  # (folder_path, size) -> [Mask, ...]，与帧列表一一对应
+        self.atlas = TextureAtlas()  # 带透明通道的帧和图片都放进图集
+        self.hits = 0
+        self.misses = 0
+        self.bytes_held = 0  # 不在图集里的图片（背景等）占用的字节数
+        self.decoded = {}  # file_path -> 已在后台线程解码、尚未转换的Surface（见AssetLoader）
+
+    def load_frames(self, folder_path, size):
+        """加载文件夹内的全部动画帧，返回共享的帧列表（调用方不要修改它）"""
+        key = (folder_path, tuple(size))
+        frames = self.frames.get(key)
+        if frames is not None:
+            self.hits += 1
+            return frames
+
+        self.misses += 1
+        frames = []
+        for img_path in list_image_files(folder_path):
+            img = convert_image(self.decode(img_path), True)
+            img = pygame.transform.scale(img, key[1])
+            frames.append(self.store(img, True))
+        self.frames[key] = frames
+        return frames
+
+    def load_masks(self, folder_path, size):
+        """动画帧的像素碰撞遮罩（与 load_frames 的帧一一对应），只在第一次请求时生成"""
+        key = (folder_path, tuple(size))
+        masks = self.masks.get(key)
+        if masks is None:
+            # 图集中的subsurface同样可以直接生成遮罩
+            masks = [pygame.mask.from_surface(frame) for frame in self.load_frames(folder_path, size)]
+            self.masks[key] = masks
+        return masks
+
+    def load_image(self, file_path, size, alpha=True):
+        """加载单张图片，失败时返回None（失败结果同样缓存，避免重复访问磁盘）"""
+        key = (file_path, tuple(size), alpha)
+        if key in self.images:
+            self.hits += 1
+            return self.images[key]
+
+        self.misses += 1
+        img = None
+        if os.path.exists(asset_path(file_path)):
+            try:
+                img = convert_image(self.decode(file_path), alpha)
+                img = self.store(pygame.transform.scale(img, key[1]), alpha)
+            except pygame.error:
+                print(f"Cannot load image: {file_path}")
+                img = None
+        else:
+            print(f"Image does not exist: {file_path}")
+        self.images[key] = img
+        return img
+
+    def load_scaled_image(self, file_path, size, source_size, alpha=True):
+        """从缓存中 source_size 的图片缩放得到 size 的图片并缓存，然后释放原尺寸的那份。
+        用于缩小画布上的背景：资源包里只有逻辑分辨率的版本，缩放后原图不再需要"""
+        key = (file_path, tuple(size), alpha)
+        if key in self.images:
+            self.hits += 1
+            return self.images[key]
+        
+        img = self.load_image(file_path, source_size, alpha)
+        if img is not None:
+            img = self.store(scale_surface(img, key[1]), alpha)
+            self.release_image(file_path, source_size, alpha)
+        self.images[key] = img
+        return img
+        
+    def release_image(self, file_path, size, alpha=True):
+        # 从缓存中移除单张图片；图集里的subsurface不单独计入字节数
+        img = self.images.pop((file_path, tuple(size), alpha), None)
+        if img is not None and img.get_parent() is None:
+            self.bytes_held -= surface_bytes(img)
+
+    def load_entry(self, entry):
+        """按资源清单条目加载：("frames", 文件夹, 尺寸) 或 ("image", 路径, 尺寸, 是否透明)"""
+        if entry[0] == "frames":
+            return self.load_frames(entry[1], entry[2])
+        return self.load_image(entry[1], entry[2], entry[3])
+
+    def has_entry(self, entry):
+        if entry[0] == "frames":
+            return (entry[1], tuple(entry[2])) in self.frames
+        return (entry[1], tuple(entry[2]), entry[3]) in self.images
+
+    def decode(self, file_path):
+        # 优先使用后台线程已经解码好的图片
+        img = self.decoded.pop(file_path, None)
+        return img if img is not None else pygame.image.load(asset_path(file_path))
+
+    def store(self, img, alpha):
+        # 透明图片放进图集，放不下的（全屏背景）单独保存
+        if alpha:
+            region = self.atlas.add(img)
+            if region is not None:
+                return region
+        self.bytes_held += surface_bytes(img)
+        return img
+
+    def attach_pack(self, pack):
+        """用预先打包的资源填充缓存，之后对这些资源的请求不再访问磁盘"""
+        self.frames.update(pack.frames)
+        self.images.update(pack.images)
+        if pack.atlas is not None:
+            self.atlas.adopt(pack.atlas, pack.atlas_used)
+        self.bytes_held += pack.bytes_held
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.frames) + len(self.images),
+            "masks": sum(len(masks) for masks in self.masks.values()),
+            "bytes_held": self.bytes_held + self.atlas.bytes_held(),
+            "atlas_pages": len(self.atlas.pages),
+            "atlas_fill": self.atlas.fill_ratio(),
+        }
+
+
+def square_mask(size, inner_size):
+    # 居中的正方形遮罩：没有图片时的碰撞区域（即原来的碰撞矩形）
+    mask = pygame.Mask((size, size))
+    offset = (size - inner_size) // 2
+    mask.draw(pygame.Mask((inner_size, inner_size), fill=True), (offset, offset))
+    return mask
+
+
+def asset_path(path):
+    # 资源路径相对于仓库根目录，与当前工作目录无关（缓存和资源包仍以相对路径为键）
+    return os.path.join(ROOT, path)
+
+
+def list_image_files(folder_path):
+    """文件夹内的图片按文件名排序，即动画帧的顺序；文件夹缺失或没有图片时抛出 FileNotFoundError。
+    动画帧决定碰撞遮罩，缺帧时静默退回纯色方块会得到另一套碰撞规则"""
+    folder = asset_path(folder_path)
+    filenames = sorted(os.listdir(folder)) if os.path.isdir(folder) else []
+    files = [os.path.join(folder_path, filename) for filename in filenames if filename.endswith(IMAGE_EXTENSIONS)]
+    if not files:
+        raise FileNotFoundError(f"Sprite folder is missing or empty: {folder}")
+    return files
+
+
+def entry_files(entry):
+    # 资源清单条目对应的源文件
+    if entry[0] == "frames":
+        return list_image_files(entry[1])
+    return [entry[1]] if os.path.exists(asset_path(entry[1])) else []
+
+
+def decode_image(file_path):
+    # 在工作线程中运行：只解码文件，失败时返回None，由主线程重新加载并报告错误
+    try:
+        return pygame.image.load(asset_path(file_path))
+    except pygame.error:
+        return None
+
+
+# 异步资源加载：工作线程解码图片文件（pygame解码期间会释放GIL），
+# 转换为显示格式和缩放在主线程逐帧完成，开始界面可以立即显示并绘制加载进度
+class AssetLoader:
+    def __init__(self, manifest, cache=None, workers=4):
+        self.cache = cache or sprite_cache
+        self.pending = []  # (清单条目, 文件列表, future列表)
+        self.total = 0
+        self.loaded = 0
+        self.executor = None
+        for entry in manifest:
+            if self.cache.has_entry(entry):
+                continue  # 已经由资源包提供
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=workers)
+            files = entry_files(entry)
+            futures = [self.executor.submit(decode_image, path) for path in files]
+            self.pending.append((entry, files, futures))
+            self.total += len(files)
+
+    @property
+    def progress(self):
+        return self.loaded / self.total if self.total else 1.0
+
+    def poll(self, budget_ms=8):
+        """在主线程每帧调用：处理已解码完成的条目，超出时间预算的留到下一帧。返回是否全部完成"""
+        start = time.perf_counter()
+        for item in list(self.pending):
+            entry, files, futures = item
+            if not all(future.done() for future in futures):
+                continue
+            self.pending.remove(item)
+            for path, future in zip(files, futures):
+                img = future.result()
+                if img is not None:
+                    self.cache.decoded[path] = img
+            self.cache.load_entry(entry)
+            self.loaded += len(files)
+            if (time.perf_counter() - start) * 1000 >= budget_ms:
+                break
+        if not self.pending and self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        return not self.pending
+
+
+def convert_image(img, alpha):
+    # 没有显示窗口时（无界面模拟）保留原始格式，只有创建窗口后才转换为显示格式
+    if pygame.display.get_surface() is None:
+        return img
+    return img.convert_alpha() if alpha else img.convert()
+
+
+def surface_bytes(surface):
+    # 按像素缓冲区实际大小计算（包含行对齐）
+    return surface.get_pitch() * surface.get_height()
+
+
+# 文字渲染服务：每个(字体, 字号)只创建一次，渲染结果放进有上限的LRU缓存
+class TextRenderer:
+    def __init__(self, max_entries=128):
+        self.fonts = {}  # (font_name, size) -> Font
+        self.surfaces = OrderedDict()  # (text, color, size, font_name) -> Surface
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get_font(self, size, font_name=None):
+        key = (font_name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.SysFont(font_name, size)
+            self.fonts[key] = font
+        return font
+
+    def render(self, text, color, size, font_name=None):
+        """返回渲染好的文字表面（共享对象，调用方不要修改它）"""
+        key = (text, tuple(color), size, font_name)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = self.get_font(size, font_name).render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "fonts": len(self.fonts),
+            "entries": len(self.surfaces),
+        }
+
+
+# 数值标签：只有整数值变化时才重新渲染（分数、生存时间等频繁变化的文字不进LRU）
+class ValueLabel:
+    def __init__(self, template, color, size, font_name=None):
+        self.template = template
+        self.color = color
+        self.size = size
+        self.font_name = font_name
+        self.value = None
+        self.surface = None
+
+    def get_surface(self, value):
+        value = int(value)
+        if value != self.value or self.surface is None:
+            self.value = value
+            font = text_renderer.get_font(self.size, self.font_name)
+            self.surface = font.render(self.template.format(value), True, self.color)
+        return self.surface
+
+
+# 进程级共享实例
+sprite_cache = SpriteCache()
+text_renderer = TextRenderer()
@@ -0,0 +1,261 @@
+"""难度平衡工具：用多进程并行跑大量无界面对局，统计不同难度参数下的生存时间和分数分布
+
+用法: python balance.py [--games 1000] [--policy greedy] [--workers 8] [--output report.json]
+                        [--sweep acceleration_factor=0.85,0.9,0.95 --sweep box_time=4000,5000 ...]
+
+每个 --sweep 给出一个配置项的候选值，所有候选值的组合（笛卡尔积）各跑 --games 局。
+每个组合相当于一个难度配置文件：覆盖在当前配置（默认配置或 GHOST_SURVIVAL_CONFIG）上，
+和配置文件一样经过 config.parse_values 校验，开始跑之前就报告不合法的组合。
+可调的配置项见 PARAMETERS；没有指定的项保持当前配置的值。
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # 保持标准输出干净
+
+from config import FIELDS, GameConfig, config, parse_values
+from game_core import FIXED_DT, GameSimulation, TimeState
+
+# 可调的配置项 -> 所在分段。屏幕和尺寸在导入 game_core 时就算成了常量，不能按局修改
+FIXED_SECTIONS = ("screen", "sizes")
+PARAMETERS = {name: section for section, fields in FIELDS.items() if section not in FIXED_SECTIONS for name in fields}
+
+
+# 机器人策略：policy(simulation) 返回输入向量 (左, 右, 上, 下)。
+# 白天和昼夜过渡（文字闪烁提示）期间一律不动，和玩家看到的规则一致
+IDLE = (False, False, False, False)
+DIRECTIONS = (
+    (True, False, False, False),
+    (False, True, False, False),
+    (False, False, True, False),
+    (False, False, False, True),
+)
+
+
+def can_move(simulation):
+    time_manager = simulation.time_manager
+    return time_manager.state == TimeState.NIGHT and not time_manager.is_transitioning
+
+
+class IdlePolicy:
+    """从不移动：只靠运气躲开警察"""
+    def __init__(self, rng):
+        pass
+
+    def __call__(self, simulation):
+        return IDLE
+
+
+class RandomPolicy:
+    """夜晚每隔一段时间随机换一个方向（或停下）"""
+    def __init__(self, rng, hold_ms=300):
+        self.rng = rng
+        self.hold_ms = hold_ms
+        self.controls = IDLE
+        self.next_change = 0
+
+    def __call__(self, simulation):
+        if not can_move(simulation):
+            return IDLE
+        if simulation.elapsed_time >= self.next_change:
+            self.next_change = simulation.elapsed_time + self.hold_ms
+            self.controls = self.rng.choice(DIRECTIONS + (IDLE,))
+        return self.controls
+
+
+class GreedyPolicy:
+    """夜晚朝宝箱移动，同一水平带上有迎面而来的警察时上下躲避"""
+    def __init__(self, rng, lookahead=300):
+        self.rng = rng
+        self.lookahead = lookahead
+
+    def __call__(self, simulation):
+        if not can_move(simulation):
+            return IDLE
+        ghost = simulation.ghost.rect
+        game_manager = simulation.game_manager
+        for police in game_manager.police_list:
+            rect = police.rect
+            if rect.bottom < ghost.top - 20 or rect.top > ghost.bottom + 20:
+                continue
+            if police.direction == "left":
+                gap = rect.left - ghost.right
+            else:
+                gap = ghost.left - rect.right
+            if -ghost.width < gap < self.lookahead:
+                # 躲到离警察更远的一侧
+                return DIRECTIONS[2] if rect.centery > ghost.centery else DIRECTIONS[3]
+        box = game_manager.treasure_box.rect
+        dx = box.centerx - ghost.centerx
+        dy = box.centery - ghost.centery
+        if abs(dx) < 5 and abs(dy) < 5:
+            return IDLE
+        if abs(dx) >= abs(dy):
+            return DIRECTIONS[0] if dx < 0 else DIRECTIONS[1]
+        return DIRECTIONS[2] if dy < 0 else DIRECTIONS[3]
+
+
+POLICIES = {
+    "idle": IdlePolicy,
+    "random": RandomPolicy,
+    "greedy": GreedyPolicy,
+}
+
+
+def init_worker():
+    # 资源路径是相对于仓库根目录的
+    os.chdir(ROOT)
+
+
+def play_game(task):
+    """在工作进程中运行一局；返回 (配置序号, 生存时间, 分数, 失败原因)"""
+    config_index, game_config, policy_name, seed, max_time = task
+    # 新开的一局从共享的 config 读取难度参数
+    config.update(game_config)
+    simulation = GameSimulation(seed=seed)
+    policy = POLICIES[policy_name](random.Random(seed ^ 0x5EED))
+    while simulation.elapsed_time < max_time:
+        if simulation.step(FIXED_DT, policy(simulation)):
+            break
+    result = simulation.result()
+    return config_index, result["survival_time"], result["score"], result["fail_reason"]
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summarize(values):
+    values = sorted(values)
+    count = len(values)
+    mean = sum(values) / count
+    return {
+        "mean": mean,
+        "std": (sum((v - mean) ** 2 for v in values) / count) ** 0.5,
+        "min": values[0],
+        "p10": percentile(values, 0.1),
+        "p50": percentile(values, 0.5),
+        "p90": percentile(values, 0.9),
+        "max": values[-1],
+    }
+
+
+def histogram(values, bin_width):
+    counts = {}
+    for value in values:
+        start = int(value // bin_width * bin_width)
+        counts[start] = counts.get(start, 0) + 1
+    return {f"{start}-{start + bin_width}": counts[start] for start in sorted(counts)}
+
+
+def parse_sweep(text):
+    # 值按JSON解析（5000、0.9），类型和范围留给 config.parse_values 检查
+    name, _, values = text.partition("=")
+    if name not in PARAMETERS or not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=V1,V2,... with NAME one of: {', '.join(PARAMETERS)}")
+    try:
+        return name, [json.loads(value) for value in values.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad value for {name}: {values}")
+
+
+def build_configs(sweeps):
+    """所有候选值的笛卡尔积；每个组合作为覆盖项校验成一份 GameConfig，返回 [(参数, 配置)]，不合法时抛出 ValueError"""
+    names = [name for name, _ in sweeps]
+    configs = []
+    for combo in itertools.product(*(values for _, values in sweeps)):
+        params = dict(zip(names, combo))
+        data = config.as_dict()
+        for name, value in params.items():
+            data[PARAMETERS[name]][name] = value
+        source = "--sweep " + ", ".join(f"{name}={value}" for name, value in params.items()) if params else config.source
+        configs.append((params, GameConfig(parse_values(data, source), source)))
+    return configs
+
+
+def print_table(report):
+    header = f"{'config':<48} {'games':>6} {'surv mean':>9} {'p10':>7} {'p50':>7} {'p90':>7} {'score p50':>9} {'killed':>7} {'seen':>6} {'alive':>6}"
+    print(header, file=sys.stderr)
+    for entry in report["configs"]:
+        survival = entry["survival_time"]
+        reasons = entry["fail_reasons"]
+        games = entry["games"]
+        label = ", ".join(f"{name}={value}" for name, value in entry["params"].items()) or "defaults"
+        print(f"{label:<48} {games:>6} {survival['mean']:>9.1f} {survival['p10']:>7.1f} {survival['p50']:>7.1f} "
+              f"{survival['p90']:>7.1f} {entry['score']['p50']:>9} "
+              f"{reasons.get('YOU GET KILLED', 0) / games:>7.0%} {reasons.get('BE DISCOVERED', 0) / games:>6.0%} "
+              f"{reasons.get('', 0) / games:>6.0%}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=1000, help="games per parameter combination")
+    parser.add_argument("--policy", default="greedy", choices=sorted(POLICIES))
+    parser.add_argument("--sweep", action="append", type=parse_sweep, default=[], metavar="NAME=V1,V2,...",
+                        help=f"config values to try; NAME is one of: {', '.join(PARAMETERS)}")
+    parser.add_argument("--max-time", type=int, default=300000, help="stop a game after this many ms")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the first game; game i uses seed + i")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--output", help="write the full JSON report to a file instead of stdout")
+    args = parser.parse_args()
+
+    try:
+        configs = build_configs(args.sweep)
+    except ValueError as error:
+        parser.error(str(error))
+    # 每个参数组合使用同一批种子，组合之间的差异只来自参数本身
+    tasks = [(i, game_config, args.policy, args.seed + game, args.max_time)
+             for i, (_, game_config) in enumerate(configs) for game in range(args.games)]
+    results = [[] for _ in configs]
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers, initializer=init_worker) as pool:
+        chunksize = max(1, len(tasks) // (args.workers * 8))
+        for config_index, survival_time, score, fail_reason in pool.imap_unordered(play_game, tasks, chunksize):
+            results[config_index].append((survival_time, score, fail_reason))
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "policy": args.policy,
+        "config": config.source,
+        "games_per_config": args.games,
+        "max_time": args.max_time,
+        "seed": args.seed,
+        "elapsed_seconds": elapsed,
+        "games_per_second": len(tasks) / elapsed,
+        "configs": [],
+    }
+    for (params, _), games in zip(configs, results):
+        survival = [game[0] for game in games]
+        scores = [game[1] for game in games]
+        reasons = {}
+        for game in games:
+            reasons[game[2]] = reasons.get(game[2], 0) + 1
+        report["configs"].append({
+            "params": params,
+            "games": len(games),
+            "survival_time": summarize(survival),
+            "survival_histogram": histogram(survival, 10),
+            "score": summarize(scores),
+            "fail_reasons": reasons,
+        })
+
+    print_table(report)
+    print(f"{len(tasks)} games in {elapsed:.1f} s ({len(tasks) / elapsed:.0f} games/s)", file=sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""警察碰撞检测基准：线性扫描 vs 水平带+车道索引 vs NumPy结构数组（粗筛命中后都做遮罩检测）
+
+用法: python benchmarks/collision_benchmark.py [--frames 200] [--seed 1]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+
+from game_core import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, POLICE_SIZE, POLICE_FALLBACK_MASK, SPEED_UNIT_MS, FIXED_DT, POLICE_GRID_CELL,
+    POLICE_INDEX_MIN, POLICE_MIN_X, POLICE_MAX_X, RED, Ghost, Police,
+)
+from spatial import BandIndex
+
+CROWD_SIZES = (10, 100, 1000, 10000)
+
+
+def make_crowd(count):
+    # 警察随机分布在整个屏幕上，保证每帧都有物体跨格子
+    crowd = []
+    for _ in range(count):
+        police = Police(random.choice(["left", "right"]), 2)
+        police.x = random.uniform(0, SCREEN_WIDTH)
+        police.update(0)
+        crowd.append(police)
+    return crowd
+
+
+def wrap(police):
+    # 走出屏幕的警察绕回另一侧，保持人数不变
+    if police.to_destroy:
+        police.to_destroy = False
+        police.x = POLICE_MAX_X if police.direction == "left" else POLICE_MIN_X
+        police.update(0)
+
+
+def hits_ghost(ghost, police):
+    # 与 GameStateManager.check_fail_conditions 相同：矩形粗筛，命中后比较遮罩
+    sprite_rect = ghost.sprite_rect
+    if not sprite_rect.colliderect(police.rect):
+        return False
+    offset = (police.rect.x - sprite_rect.x, police.rect.y - sprite_rect.y)
+    return ghost.get_mask().overlap(police.get_mask(), offset) is not None
+
+
+def run_linear(crowd, ghost, frames):
+    query_time = 0.0
+    start = time.perf_counter()
+    for _ in range(frames):
+        for police in crowd:
+            police.update(FIXED_DT)
+            wrap(police)
+        query_start = time.perf_counter()
+        # 统计全部命中而不是遇到第一个就停止，模拟正常游戏中"没有碰撞"的最坏情况
+        hits = 0
+        for police in crowd:
+            if hits_ghost(ghost, police):
+                hits += 1
+        query_time += time.perf_counter() - query_start
+    return time.perf_counter() - start, query_time
+
+
+def run_band(crowd, ghost, frames):
+    # 与游戏中相同：刷新时登记一次，每帧只推进索引的时钟；绕回另一侧相当于离开后重新刷新
+    grid = BandIndex(POLICE_GRID_CELL, POLICE_SIZE, POLICE_SIZE)
+    for police in crowd:
+        grid.insert(police, police.y, police.x, police.velocity)
+    query_time = 0.0
+    start = time.perf_counter()
+    for _ in range(frames):
+        grid.advance(FIXED_DT / SPEED_UNIT_MS)
+        for police in crowd:
+            police.update(FIXED_DT)
+            if police.to_destroy:
+                grid.remove(police)
+                wrap(police)
+                grid.insert(police, police.y, police.x, police.velocity)
+        query_start = time.perf_counter()
+        hits = 0
+        candidates = grid.query(ghost.sprite_rect) if len(crowd) > POLICE_INDEX_MIN else crowd
+        for police in candidates:
+            if hits_ghost(ghost, police):
+                hits += 1
+        query_time += time.perf_counter() - query_start
+    return time.perf_counter() - start, query_time
+
+
+def run_numpy(crowd, ghost, frames):
+    from crowd import PoliceCrowd
+
+    store = PoliceCrowd(POLICE_FALLBACK_MASK, SPEED_UNIT_MS, RED)
+    for police in crowd:
+        store.spawn(police.direction, 2)
+        store.x[len(store) - 1] = police.x
+    query_time = 0.0
+    start = time.perf_counter()
+    for _ in range(frames):
+        store.update(FIXED_DT)
+        # 补回出界的警察，保持人数不变
+        missing = len(crowd) - len(store)
+        for _ in range(missing):
+            store.spawn(random.choice(["left", "right"]), 2)
+        query_start = time.perf_counter()
+        store.collides(ghost.sprite_rect, ghost.get_mask())
+        query_time += time.perf_counter() - query_start
+    return time.perf_counter() - start, query_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    pygame.init()
+    ghost = Ghost(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, 5)
+
+    print(f"{'police':>8} {'linear query':>14} {'band query':>12} {'numpy query':>13} "
+          f"{'linear frame':>14} {'band frame':>12} {'numpy frame':>13}")
+    for count in CROWD_SIZES:
+        random.seed(args.seed)
+        linear_total, linear_query = run_linear(make_crowd(count), ghost, args.frames)
+        random.seed(args.seed)
+        band_total, band_query = run_band(make_crowd(count), ghost, args.frames)
+        random.seed(args.seed)
+        numpy_total, numpy_query = run_numpy(make_crowd(count), ghost, args.frames)
+        # 单位：每帧微秒
+        scale = 1e6 / args.frames
+        print(f"{count:>8} {linear_query * scale:>12.1f}us {band_query * scale:>10.1f}us {numpy_query * scale:>11.1f}us "
+              f"{linear_total * scale:>12.1f}us {band_total * scale:>10.1f}us {numpy_total * scale:>11.1f}us")
+
+
+if __name__ == "__main__":
+    main()
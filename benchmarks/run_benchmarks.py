@@ -0,0 +1,248 @@
+"""游戏性能基准：在SDL dummy驱动下用固定随机种子运行脚本化场景，输出JSON
+
+用法: python benchmarks/run_benchmarks.py [--frames 600] [--warmup 30] [--seed 1234] [--output result.json]
+                                          [--scenario dense_night ...] [--quality low] [--dirty-rects] [--tracemalloc]
+
+每个场景记录各阶段耗时（update / collision / draw / flip，毫秒；缩小画质时flip包含画布放大）、帧率和内存分配情况，
+把两次提交的JSON结果放在一起比较即可发现性能回退。--dirty-rects 按主程序的脏矩形模式绘制，并记录每帧提交的像素比例。计时前先按画布尺寸加载背景并运行若干不计时的预热帧，
+警察场景还会先推进到第一波警察出现，所以结果与场景的运行顺序、选择和帧数无关。
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # 保持标准输出为纯JSON
+
+import pygame
+
+from assets import sprite_cache
+from game_core import SCREEN_WIDTH, SCREEN_HEIGHT, FIXED_DT, GameSimulation, TimeState
+from render import QUALITY_PRESETS, DirtyRectRenderer, RenderCanvas
+
+PHASES = ("update", "collision", "draw", "flip")
+NEVER = 10 ** 9  # 足够长的持续时间，用来固定昼夜状态
+PREROLL_LIMIT = 10000  # 推进到第一波警察时最多模拟的时间（毫秒）
+IDLE = (False, False, False, False)
+
+
+def advance(simulation):
+    # 推进一个模拟步；基准中鬼魂不会死亡，保证每个场景都跑满帧数
+    simulation.ghost.stop_moving()
+    simulation.update(FIXED_DT, IDLE)
+    simulation.check_collisions()
+    simulation.game_manager.game_over = False
+
+
+def preroll_first_wave(simulation):
+    # 不绘制地推进模拟直到第一波警察出现（第一波在2-3秒后），帧数较少时也能测到警察
+    game_manager = simulation.game_manager
+    while game_manager.police_count() == 0 and simulation.elapsed_time < PREROLL_LIMIT:
+        advance(simulation)
+    # 刷新的警察要走完整个屏幕才会离开；刚刷新就被销毁说明刷新位置和销毁范围不一致，场景测不到预期的人数
+    first_wave = game_manager.police_count()
+    advance(simulation)
+    if game_manager.police_count() < first_wave:
+        raise RuntimeError(f"only {game_manager.police_count()} of {first_wave} police survived their first update")
+
+
+def setup_idle_day(simulation):
+    # 一直是白天，鬼魂不动：没有警察，只有背景、宝箱和文字
+    time_manager = simulation.time_manager
+    time_manager.state = TimeState.MORNING
+    time_manager.durations = {TimeState.MORNING: NEVER, TimeState.NIGHT: NEVER}
+
+
+def setup_night(simulation):
+    time_manager = simulation.time_manager
+    time_manager.state = TimeState.NIGHT
+    time_manager.durations = {TimeState.MORNING: NEVER, TimeState.NIGHT: NEVER}
+
+
+def setup_dense_night(simulation):
+    # 一直是夜晚，警察按正常节奏成波刷新并在屏幕上累积
+    setup_night(simulation)
+    preroll_first_wave(simulation)
+
+
+def setup_rapid_cycling(simulation):
+    # 昼夜持续时间已经缩短到1000毫秒下限，不停地过渡
+    simulation.time_manager.durations = {TimeState.MORNING: 1000, TimeState.NIGHT: 1000}
+
+
+def setup_police_10x(simulation):
+    # 夜晚 + 每波10倍数量的警察
+    setup_night(simulation)
+    simulation.game_manager.police_per_wave = (40, 50)
+    preroll_first_wave(simulation)
+
+
+SCENARIOS = {
+    "idle_day": setup_idle_day,
+    "dense_night": setup_dense_night,
+    "rapid_cycling": setup_rapid_cycling,
+    "police_10x": setup_police_10x,
+}
+
+
+def draw(simulation, surface, dirty_renderer):
+    # 与主程序相同的绘制路径；脏矩形模式返回本帧绘制的区域
+    if dirty_renderer is None:
+        simulation.draw(surface)
+        return None
+    time_manager = simulation.time_manager
+    if not dirty_renderer.begin_frame(surface, time_manager.get_background(surface.get_size())):
+        time_manager.draw_background(surface)
+    return simulation.draw_foreground(surface)
+
+
+def present(canvas, dirty_renderer, rects):
+    if dirty_renderer is None:
+        canvas.present()
+    else:
+        dirty_renderer.end_frame(rects, canvas)
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    count = len(samples)
+    return {
+        "mean": sum(samples) / count,
+        "p50": samples[count // 2],
+        "p95": samples[min(count - 1, int(count * 0.95))],
+        "max": samples[-1],
+    }
+
+
+def run_scenario(name, canvas, frames, seed, crowd_backend, trace, warmup=30, dirty_rects=False):
+    simulation = GameSimulation(crowd_backend, seed)
+    dirty_renderer = DirtyRectRenderer() if dirty_rects else None
+    SCENARIOS[name](simulation)
+    game_manager = simulation.game_manager
+    first_wave = game_manager.police_count()
+    # 背景在第一次绘制时才加载（第一个场景要解码图片），预热帧让各种缓存都进入稳定状态
+    simulation.time_manager.load_backgrounds(canvas.surface.get_size())
+    for _ in range(warmup):
+        advance(simulation)
+        present(canvas, dirty_renderer, draw(simulation, canvas.surface, dirty_renderer))
+        pygame.event.pump()
+    timings = {phase: [] for phase in PHASES}
+    dirty_fill = []
+    max_police = 0
+
+    gc.collect()
+    gc_before = sum(stat["collections"] for stat in gc.get_stats())
+    blocks_before = sys.getallocatedblocks()
+    if trace:
+        tracemalloc.start()
+    clock = time.perf_counter
+    start = clock()
+
+    for _ in range(frames):
+        t0 = clock()
+        simulation.ghost.stop_moving()
+        simulation.update(FIXED_DT, IDLE)
+        t1 = clock()
+        simulation.check_collisions()
+        # 基准中鬼魂不会死亡，保证每个场景都跑满帧数
+        game_manager.game_over = False
+        t2 = clock()
+        rects = draw(simulation, canvas.surface, dirty_renderer)
+        t3 = clock()
+        present(canvas, dirty_renderer, rects)
+        t4 = clock()
+        pygame.event.pump()
+
+        timings["update"].append((t1 - t0) * 1000)
+        timings["collision"].append((t2 - t1) * 1000)
+        timings["draw"].append((t3 - t2) * 1000)
+        timings["flip"].append((t4 - t3) * 1000)
+        max_police = max(max_police, game_manager.police_count())
+        if dirty_renderer is not None:
+            dirty_fill.append(dirty_renderer.stats()["fill"])
+
+    elapsed = clock() - start
+    result = {
+        "frames": frames,
+        "fps": frames / elapsed,
+        "frame_ms": summarize([sum(values) for values in zip(*timings.values())]),
+        "phases_ms": {phase: summarize(values) for phase, values in timings.items()},
+        "first_wave": first_wave,
+        "max_police": max_police,  # 计时期间同时在场的警察人数峰值
+        "allocated_blocks": sys.getallocatedblocks() - blocks_before,
+        "gc_collections": sum(stat["collections"] for stat in gc.get_stats()) - gc_before,
+        "background_bytes": simulation.time_manager.texture_bytes(),
+    }
+    if dirty_renderer is not None:
+        result["dirty_fill"] = summarize(dirty_fill)  # 每帧提交的像素占整个画布的比例
+    if trace:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["traced_bytes"] = current
+        result["traced_peak_bytes"] = peak
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=600, help="每个场景运行的帧数")
+    parser.add_argument("--warmup", type=int, default=30, help="每个场景计时前运行的不计时帧数")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="只运行指定场景（可重复），默认全部运行")
+    parser.add_argument("--crowd-backend", default="objects", choices=("objects", "numpy"))
+    parser.add_argument("--quality", default="native", choices=list(QUALITY_PRESETS), help="渲染画质预设")
+    parser.add_argument("--dirty-rects", action="store_true", help="按脏矩形模式绘制，记录每帧提交的像素比例")
+    parser.add_argument("--tracemalloc", action="store_true", help="统计Python内存分配（会拖慢计时）")
+    parser.add_argument("--output", help="把JSON结果写入文件，默认输出到标准输出")
+    args = parser.parse_args()
+
+    pygame.init()
+    canvas = RenderCanvas((SCREEN_WIDTH, SCREEN_HEIGHT), QUALITY_PRESETS[args.quality])
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "seed": args.seed,
+        "crowd_backend": args.crowd_backend,
+        "quality": args.quality,
+        "upscale": canvas.upscale,
+        "dirty_rects": args.dirty_rects,
+        "warmup": args.warmup,
+        "scenarios": {},
+    }
+    for name in args.scenario or SCENARIOS:
+        report["scenarios"][name] = run_scenario(name, canvas, args.frames, args.seed,
+                                                 args.crowd_backend, args.tracemalloc, args.warmup, args.dirty_rects)
+    report["sprite_cache_bytes"] = sprite_cache.stats()["bytes_held"]
+    pygame.quit()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""游戏配置：尺寸、速度和时间参数从 game_config.json 读取，启动时加载并校验一次，派生常量也在加载时算好
+
+环境变量 GHOST_SURVIVAL_CONFIG 可以指向一个难度配置文件，只需按同样的分段写出要覆盖的项，例如
+    {"day_night": {"night_ms": 6000}, "police": {"wave_min": 5, "wave_max": 7}}
+"""
+import hashlib
+import json
+import os
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CONFIG = os.path.join(ROOT, "game_config.json")
+CONFIG_ENV = "GHOST_SURVIVAL_CONFIG"
+
+# 配置项：分段 -> {名称: (类型, 说明)}
+FIELDS = {
+    "screen": {
+        "screen_width": (int, "logical screen width (px)"),
+        "screen_height": (int, "logical screen height (px)"),
+    },
+    "sizes": {
+        "ghost_size": (int, "ghost sprite size (px)"),
+        "police_size": (int, "police sprite size (px)"),
+        "box_size": (int, "treasure box size (px)"),
+        "collision_ratio": (float, "box pickup area relative to the ghost sprite"),
+        "police_grid_cell": (int, "band height of the police collision index (px)"),
+    },
+    "ghost": {
+        "ghost_speed": (int, "ghost speed (px per 60 Hz frame)"),
+        "ghost_animation_ms": (int, "ghost animation frame time (ms)"),
+    },
+    "day_night": {
+        "morning_ms": (int, "initial day length (ms)"),
+        "night_ms": (int, "initial night length (ms)"),
+        "acceleration_interval": (int, "how often day/night lengths shrink (ms)"),
+        "acceleration_factor": (float, "day/night length multiplier per speed-up"),
+        "min_duration": (int, "shortest day/night length (ms)"),
+    },
+    "police": {
+        "base_speed": (int, "initial police base speed"),
+        "speed_spread": (int, "random extra speed per officer, 0 to this value"),
+        "speed_interval": (int, "how often police base speed increases (ms of night)"),
+        "speed_step": (int, "police base speed increase per step"),
+        "wave_min": (int, "fewest police per wave"),
+        "wave_max": (int, "most police per wave"),
+        "spawn_min": (int, "shortest gap between waves (ms)"),
+        "spawn_max": (int, "longest gap between waves (ms)"),
+        "police_spawn_margin": (int, "distance kept from the top and bottom edges when spawning (px)"),
+        "police_animation_ms": (int, "police animation frame time (ms)"),
+    },
+    "treasure": {
+        "box_time": (int, "treasure box lifetime (ms)"),
+        "box_margin": (int, "distance kept from the screen edges when spawning (px)"),
+        "box_points": (int, "points per collected box"),
+    },
+}
+
+# 必须大于0的项（其余数值项只要求不小于0）；为0的间隔会让定时器在同一时刻无限触发
+POSITIVE = {
+    "screen_width", "screen_height", "ghost_size", "police_size", "box_size", "collision_ratio",
+    "police_grid_cell", "ghost_animation_ms", "morning_ms", "night_ms", "acceleration_interval",
+    "acceleration_factor", "min_duration", "speed_interval", "wave_min", "spawn_min",
+    "police_animation_ms", "box_time",
+}
+
+
+# 校验过的配置：每个配置项是同名属性，派生常量在构造时一次算好
+class GameConfig:
+    def __init__(self, values, source=DEFAULT_CONFIG):
+        self.source = source
+        for name, value in values.items():
+            setattr(self, name, value)
+        self.derive()
+
+    def derive(self):
+        self.screen_size = (self.screen_width, self.screen_height)
+        self.ghost_sprite_size = (self.ghost_size, self.ghost_size)
+        self.police_sprite_size = (self.police_size, self.police_size)
+        self.box_sprite_size = (self.box_size, self.box_size)
+
+        # 宝箱拾取矩形（以及没有图片时的碰撞区域）：居中的正方形
+        self.ghost_collision_size = int(self.ghost_size * self.collision_ratio)
+        self.ghost_collision_offset = (self.ghost_size - self.ghost_collision_size) // 2
+        self.police_collision_size = int(self.police_size * self.collision_ratio)
+
+        # 鬼魂左上角的活动范围，以及警察和宝箱的刷新范围（randint 的闭区间）
+        self.ghost_max_x = self.screen_width - self.ghost_size
+        self.ghost_max_y = self.screen_height - self.ghost_size
+        self.police_spawn_y = (self.police_spawn_margin, self.screen_height - self.police_spawn_margin)
+        # 警察在紧贴屏幕左右边缘的屏幕外刷新（右行在左端，左行在右端），左上角x走出这个闭区间时整个图像已离开屏幕，销毁
+        self.police_x_range = (-self.police_size, self.screen_width)
+        self.box_spawn_x = (self.box_margin, self.screen_width - self.box_size - self.box_margin)
+        self.box_spawn_y = (self.box_margin, self.screen_height - self.box_size - self.box_margin)
+
+        self.check(self.collision_ratio <= 1, "collision_ratio must not be greater than 1")
+        self.check(self.acceleration_factor <= 1, "acceleration_factor must not be greater than 1")
+        self.check(self.wave_min <= self.wave_max, "wave_min must not be greater than wave_max")
+        self.check(self.spawn_min <= self.spawn_max, "spawn_min must not be greater than spawn_max")
+        self.check(self.ghost_max_x >= 0 and self.ghost_max_y >= 0, "ghost_size does not fit on the screen")
+        self.check(self.police_spawn_y[0] <= self.police_spawn_y[1], "police_spawn_margin leaves no room to spawn")
+        self.check(self.box_spawn_x[0] <= self.box_spawn_x[1] and self.box_spawn_y[0] <= self.box_spawn_y[1],
+                   "box_margin leaves no room to spawn")
+
+    def check(self, condition, message):
+        if not condition:
+            raise ValueError(f"{self.source}: {message}")
+
+    def as_dict(self):
+        """按分段输出全部配置项（可以直接写回配置文件）"""
+        return {section: {name: getattr(self, name) for name in fields} for section, fields in FIELDS.items()}
+
+    def update(self, other):
+        """改用另一份配置的全部配置项；各模块按名字导入了进程级共享的 config，所以只能原地更新"""
+        self.source = other.source
+        for fields in other.as_dict().values():
+            for name, value in fields.items():
+                setattr(self, name, value)
+        self.derive()
+
+    def digest(self):
+        """全部配置项的指纹（8字节），配置相同则相同，与配置文件的写法和来源无关"""
+        text = json.dumps(self.as_dict(), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(text.encode("utf-8")).digest()[:8]
+
+
+def read_json(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a JSON object")
+    return data
+
+
+def parse_values(data, source):
+    # 检查分段和配置项是否齐全、类型是否正确，返回 {名称: 值}
+    values = {}
+    for section, fields in FIELDS.items():
+        items = data.get(section)
+        if not isinstance(items, dict):
+            raise ValueError(f"{source}: missing section '{section}'")
+        for name, (kind, _) in fields.items():
+            if name not in items:
+                raise ValueError(f"{source}: missing {section}.{name}")
+            value = items[name]
+            # bool 是 int 的子类，要单独排除；float 项也接受整数写法
+            valid_types = (int, float) if kind is float else (int,)
+            if isinstance(value, bool) or not isinstance(value, valid_types):
+                raise ValueError(f"{source}: {section}.{name} must be {kind.__name__}, got {value!r}")
+            value = kind(value)
+            if value < 0 or (value == 0 and name in POSITIVE):
+                bound = "positive" if name in POSITIVE else "non-negative"
+                raise ValueError(f"{source}: {section}.{name} must be {bound}, got {value!r}")
+            values[name] = value
+    for section, items in data.items():
+        if section not in FIELDS:
+            raise ValueError(f"{source}: unknown section '{section}'")
+        for name in items:
+            if name not in FIELDS[section]:
+                raise ValueError(f"{source}: unknown option {section}.{name}")
+    return values
+
+
+def load_config(profile_path=None, default_path=DEFAULT_CONFIG):
+    """读取默认配置，再用难度配置文件（可选）中的项覆盖；校验失败时抛出 ValueError"""
+    data = read_json(default_path)
+    source = default_path
+    if profile_path:
+        source = profile_path
+        for section, items in read_json(profile_path).items():
+            if section not in FIELDS or not isinstance(items, dict):
+                raise ValueError(f"{profile_path}: unknown section '{section}'")
+            data.setdefault(section, {}).update(items)
+    return GameConfig(parse_values(data, source), source)
+
+
+# 进程级共享实例：第一次导入时加载一次
+config = load_config(os.environ.get(CONFIG_ENV))
@@ -0,0 +1,152 @@
+import random
+
+import numpy as np
+
+from assets import sprite_cache
+from config import config
+from render import LAYER_POLICE
+
+# 方向编码：-1 向左移动（从右侧进入），+1 向右移动（从左侧进入）
+LEFT = -1
+RIGHT = 1
+
+
+# 警察人群的结构数组（SoA）存储：位置、速度、方向、动画帧都放在NumPy数组里，
+# 移动、动画、出界清理和与鬼魂的碰撞粗筛全部向量化，只有粗筛命中的少数警察才逐个做遮罩检测。
+# 尺寸、刷新范围和动画参数与 Police 一样直接取自 config，构造参数只传配置里没有的东西
+class PoliceCrowd:
+    def __init__(self, fallback_mask, speed_unit, fallback_color, capacity=64):
+        size = config.police_size
+        self.size = size
+        self.fallback_mask = fallback_mask  # 没有图片时使用的碰撞遮罩
+        self.min_x, self.max_x = config.police_x_range  # 刷新位置；左上角x超出 [min_x, max_x] 时移除
+        self.fallback_color = fallback_color  # 没有图片时绘制的纯色方块
+        self.speed_unit = speed_unit
+        self.animation_delay = config.police_animation_ms  # 毫秒
+
+        self.images = {
+            LEFT: sprite_cache.load_frames("251019Halloween/image/Police/PoliceLeft", (size, size)),
+            RIGHT: sprite_cache.load_frames("251019Halloween/image/Police/PoliceRight", (size, size)),
+        }
+        self.masks = {
+            LEFT: sprite_cache.load_masks("251019Halloween/image/Police/PoliceLeft", (size, size)),
+            RIGHT: sprite_cache.load_masks("251019Halloween/image/Police/PoliceRight", (size, size)),
+        }
+
+        self.count = 0
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.prev_x = np.zeros(capacity, dtype=np.float64)  # 上一个模拟步的位置，用于渲染插值
+        self.y = np.zeros(capacity, dtype=np.int64)
+        self.speed = np.zeros(capacity, dtype=np.int64)
+        self.direction = np.zeros(capacity, dtype=np.int8)
+        self.frame = np.zeros(capacity, dtype=np.int64)
+        self.animation_timer = np.zeros(capacity, dtype=np.float64)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, direction, base_speed, rng=random):
+        """新增一个警察，随机数的调用顺序与 Police.__init__ 保持一致"""
+        if self.count == len(self.x):
+            self._grow()
+        i = self.count
+        self.count += 1
+
+        self.speed[i] = rng.randint(base_speed, base_speed + config.speed_spread)
+        if direction == "left":
+            self.direction[i] = LEFT
+            self.x[i] = self.max_x  # 从右侧进入
+        else:
+            self.direction[i] = RIGHT
+            self.x[i] = self.min_x  # 从左侧进入
+        self.y[i] = rng.randint(*config.police_spawn_y)
+        self.prev_x[i] = self.x[i]
+        self.frame[i] = 0
+        self.animation_timer[i] = 0
+        self.alive[i] = True
+
+    def update(self, dt):
+        n = self.count
+        if n == 0:
+            return
+        x = self.x[:n]
+        self.prev_x[:n] = x
+
+        # 移动（与 Police.update 相同的运算顺序，保证结果一致）
+        distance = self.speed[:n] * dt / self.speed_unit
+        x += np.where(self.direction[:n] == LEFT, -distance, distance)
+
+        # 动画：计时器超过间隔的警察切换到下一帧
+        timer = self.animation_timer[:n]
+        timer += dt
+        advance = timer >= self.animation_delay
+        if advance.any():
+            timer[advance] = 0
+            frame_count = max(1, len(self.images[LEFT]))
+            self.frame[:n][advance] = (self.frame[:n][advance] + 1) % frame_count
+
+        # 检查是否超出屏幕
+        self.alive[:n] = (x >= self.min_x) & (x <= self.max_x)
+        if not self.alive[:n].all():
+            self._compact()
+
+    def collides(self, rect, mask):
+        """是否有警察与位于rect、遮罩为mask的物体发生像素级重叠"""
+        n = self.count
+        if n == 0:
+            return False
+        # 粗筛：图像矩形相交
+        left = self.x[:n].astype(np.int64)
+        top = self.y[:n]
+        size = self.size
+        hit = ((left < rect.right) & (left + size > rect.left)
+               & (top < rect.bottom) & (top + size > rect.top))
+        for i in np.flatnonzero(hit).tolist():
+            masks = self.masks[int(self.direction[i])]
+            police_mask = masks[self.frame[i]] if masks else self.fallback_mask
+            if mask.overlap(police_mask, (int(left[i]) - rect.x, int(top[i]) - rect.y)):
+                return True
+        return False
+
+    def draw(self, batch, alpha=1.0):
+        n = self.count
+        if n == 0:
+            return
+        xs = (self.prev_x[:n] + (self.x[:n] - self.prev_x[:n]) * alpha).astype(np.int64)
+        # 先用向量运算剔除完全在视口外的警察（刚刷新时都在屏幕外）
+        viewport = batch.viewport
+        visible = (xs < viewport.right) & (xs + self.size > viewport.left)
+        batch.culled += n - int(visible.sum())
+        xs = xs[visible].tolist()
+        ys = self.y[:n][visible].tolist()
+        frames = self.frame[:n][visible].tolist()
+        directions = self.direction[:n][visible].tolist()
+        for x, y, frame, direction in zip(xs, ys, frames, directions):
+            images = self.images[direction]
+            if images:
+                batch.add(LAYER_POLICE, images[frame], (x, y))
+            else:
+                # 如果没有图片，使用默认图形
+                batch.add_rect(LAYER_POLICE, self.fallback_color, (x, y, self.size, self.size))
+
+    def clear(self):
+        self.count = 0
+
+    def _compact(self):
+        # 删除出界的警察，保持剩余警察的先后顺序
+        n = self.count
+        keep = self.alive[:n].copy()
+        m = int(keep.sum())
+        for array in (self.x, self.prev_x, self.y, self.speed, self.direction,
+                      self.frame, self.animation_timer, self.alive):
+            array[:m] = array[:n][keep]
+        self.count = m
+
+    def _grow(self):
+        capacity = len(self.x) * 2
+        for name in ("x", "prev_x", "y", "speed", "direction", "frame", "animation_timer", "alive"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
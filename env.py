@@ -0,0 +1,437 @@
+"""强化学习环境：Gym风格的 reset / step 接口（需要安装numpy）
+
+GhostSurvivalEnv          在现有的 GameSimulation 上包一层，规则与游戏完全一致
+VectorGhostSurvivalEnv    用NumPy数组同步推进N局独立的游戏，每局的状态都是数组中的一列，
+                          一次step只有固定数量的向量运算，适合大批量采样
+
+两者的动作和观测格式相同：
+    动作  0 不动, 1 左, 2 右, 3 上, 4 下
+    观测  float32 向量，见 OBSERVATION_FIELDS 和 police_observation_size
+    奖励  本步分数增量（生存时间每秒1分，宝箱5分）；失败时 terminated 为True
+"""
+import random
+
+import numpy as np
+import pygame
+
+from config import config
+from game_core import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, GHOST_SIZE, POLICE_SIZE, BOX_SIZE,
+    GHOST_COLLISION_SIZE, GHOST_COLLISION_OFFSET, GHOST_MAX_X, GHOST_MAX_Y, POLICE_MIN_X, POLICE_MAX_X,
+    SPEED_UNIT_MS, FIXED_DT, GameSimulation, Police, TimeState, TimeStateManager,
+)
+
+NOOP, LEFT, RIGHT, UP, DOWN = range(5)
+ACTION_CONTROLS = (
+    (False, False, False, False),
+    (True, False, False, False),
+    (False, True, False, False),
+    (False, False, True, False),
+    (False, False, False, True),
+)
+
+# 观测向量开头的固定字段，后面跟着离鬼魂最近的K个警察，每个 (dx, dy, 速度, 是否存在)
+OBSERVATION_FIELDS = (
+    "ghost_x", "ghost_y", "night", "transitioning", "phase_progress",
+    "box_x", "box_y", "box_time_left", "police_base_speed",
+)
+POLICE_FIELDS = 4
+SPEED_SCALE = 10.0  # 速度归一化（像素/参考帧）
+
+
+def observation_size(nearest_police):
+    return len(OBSERVATION_FIELDS) + nearest_police * POLICE_FIELDS
+
+
+def police_features(ghost_x, ghost_y, police_x, police_y, police_velocity, alive, nearest_police):
+    """按与鬼魂的距离取最近的K个警察；输入为 (N, P) 数组，返回 (N, K*4)"""
+    n, capacity = police_x.shape
+    dx = (police_x - ghost_x[:, None]) / SCREEN_WIDTH
+    dy = (police_y - ghost_y[:, None]) / SCREEN_HEIGHT
+    distance = np.where(alive, dx * dx + dy * dy, np.inf)
+    k = min(nearest_police, capacity)
+    if k < capacity:
+        order = np.argpartition(distance, k - 1, axis=1)[:, :k]
+    else:
+        order = np.broadcast_to(np.arange(capacity), (n, capacity))
+    rows = np.arange(n)[:, None]
+    present = alive[rows, order]
+    features = np.zeros((n, nearest_police, POLICE_FIELDS), dtype=np.float32)
+    features[:, :k, 0] = np.where(present, dx[rows, order], 0)
+    features[:, :k, 1] = np.where(present, dy[rows, order], 0)
+    features[:, :k, 2] = np.where(present, police_velocity[rows, order] / SPEED_SCALE, 0)
+    features[:, :k, 3] = present
+    return features.reshape(n, nearest_police * POLICE_FIELDS)
+
+
+# 单局环境：直接驱动 GameSimulation
+class GhostSurvivalEnv:
+    def __init__(self, nearest_police=8, max_time=None, crowd_backend="objects"):
+        self.nearest_police = nearest_police
+        self.max_time = max_time  # 毫秒，到达后 truncated 为True；None 表示不限
+        self.crowd_backend = crowd_backend
+        self.observation_size = observation_size(nearest_police)
+        self.action_count = len(ACTION_CONTROLS)
+        self.rng = random.Random()
+        self.simulation = None
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng.seed(seed)
+        game_seed = self.rng.randrange(2 ** 32)
+        if self.simulation is None:
+            self.simulation = GameSimulation(self.crowd_backend, seed=game_seed)
+        else:
+            # 训练时频繁重开：原地重置，复用警察对象池和已加载的资源
+            self.simulation.reset(game_seed)
+        return self.observe(), {}
+
+    def step(self, action):
+        simulation = self.simulation
+        score = simulation.game_manager.score
+        terminated = simulation.step(FIXED_DT, ACTION_CONTROLS[action])
+        reward = simulation.game_manager.score - score
+        truncated = self.max_time is not None and simulation.elapsed_time >= self.max_time
+        info = {"fail_reason": simulation.game_manager.fail_reason} if terminated else {}
+        return self.observe(), reward, terminated, truncated, info
+
+    def observe(self):
+        simulation = self.simulation
+        ghost = simulation.ghost
+        time_manager = simulation.time_manager
+        game_manager = simulation.game_manager
+        box = game_manager.treasure_box
+        header = np.array([
+            ghost.x / SCREEN_WIDTH,
+            ghost.y / SCREEN_HEIGHT,
+            time_manager.state == TimeState.NIGHT,
+            time_manager.is_transitioning,
+            time_manager.current_duration / time_manager.durations[time_manager.state],
+            box.x / SCREEN_WIDTH,
+            box.y / SCREEN_HEIGHT,
+            max(0, box.max_time - box.timer) / box.max_time,
+            game_manager.police_base_speed / SPEED_SCALE,
+        ], dtype=np.float32)
+
+        crowd = game_manager.police_crowd
+        if crowd is not None:
+            n = crowd.count
+            xs, ys = crowd.x[:n], crowd.y[:n].astype(np.float64)
+            velocity = crowd.speed[:n] * crowd.direction[:n]
+        else:
+            police_list = game_manager.police_list
+            xs = np.array([police.x for police in police_list], dtype=np.float64)
+            ys = np.array([police.y for police in police_list], dtype=np.float64)
+            velocity = np.array([-police.speed if police.direction == "left" else police.speed
+                                 for police in police_list], dtype=np.float64)
+        if len(xs):
+            police = police_features(np.array([ghost.x]), np.array([ghost.y]), xs[None, :], ys[None, :],
+                                     velocity[None, :], np.ones((1, len(xs)), dtype=bool),
+                                     self.nearest_police)[0]
+        else:
+            police = np.zeros(self.nearest_police * POLICE_FIELDS, dtype=np.float32)
+        return np.concatenate([header, police])
+
+
+# 批量环境：N局游戏的全部状态放在NumPy数组里同步推进，结束的局自动重新开始。
+# 规则与 GameSimulation 逐条对应（包括昼夜过渡、加速、警察刷新、动画帧和像素级碰撞）。
+# 单局游戏的定时事件由调度器在准确时刻触发，这里按步检查各事件的到期时刻，
+# 后续事件同样从准确时刻起算；同一步内几个事件的先后顺序和随机数来源与单局游戏不同，
+# 因此与同种子的单局游戏统计上一致，但不是逐位相同的
+class VectorGhostSurvivalEnv:
+    def __init__(self, num_envs, nearest_police=8, police_capacity=64, max_time=None, seed=None):
+        self.num_envs = num_envs
+        self.nearest_police = nearest_police
+        self.police_capacity = police_capacity  # 每局最多同时存在的警察，超出的新警察不再生成
+        self.max_time = max_time
+        self.observation_size = observation_size(nearest_police)
+        self.action_count = len(ACTION_CONTROLS)
+        self.rng = np.random.default_rng(seed)
+
+        # 难度参数取自一局新游戏的默认值，保证与游戏规则一致
+        template = GameSimulation(seed=0)
+        time_manager = template.time_manager
+        game_manager = template.game_manager
+        self.ghost_start = (template.ghost.x, template.ghost.y)
+        self.ghost_speed = template.ghost.speed
+        self.initial_durations = (time_manager.durations[TimeState.MORNING], time_manager.durations[TimeState.NIGHT])
+        self.initial_night = time_manager.state == TimeState.NIGHT
+        self.acceleration_interval = time_manager.acceleration_interval
+        self.acceleration_factor = time_manager.acceleration_factor
+        self.min_duration = time_manager.min_duration
+        self.police_per_wave = game_manager.police_per_wave
+        self.spawn_interval = game_manager.spawn_interval
+        self.speed_increase_interval = game_manager.speed_increase_interval
+        self.speed_step = game_manager.speed_step
+        self.initial_base_speed = game_manager.police_base_speed
+        self.box_time = game_manager.treasure_box.max_time
+
+        # 碰撞遮罩和动画参数同样取自游戏对象；图像矩形相交只是粗筛，命中的少数才比较遮罩。
+        # 精灵文件夹缺失时加载就会失败，不会退回纯色方块、在另一套碰撞形状上训练
+        ghost = template.ghost
+        self.ghost_masks = {False: ghost.masks_right, True: ghost.masks_left}
+        self.ghost_animation_delay = ghost.animation_delay
+        self.police_masks = {}
+        for direction, left in (("left", True), ("right", False)):
+            police = Police(direction, 0, random.Random(0))
+            self.police_masks[left] = police.masks
+        # 警察的动画计时器每步加dt、到时清零，所以每隔固定步数换一帧；
+        # 只在碰撞检测时按出生以来的步数算出当前帧，不必每步更新 (N, P) 的计时器
+        timer = 0.0
+        self.police_frame_steps = 0
+        while timer < police.animation_delay:
+            timer += FIXED_DT
+            self.police_frame_steps += 1
+        # 每对 (鬼魂帧, 警察帧) 预先算好所有相对位置上遮罩是否重叠，命中检测只需查表；
+        # Mask.convolve 的 (x, y) 位等价于 overlap(other, (x - 宽 + 1, y - 高 + 1))
+        ghost_frames = self.ghost_masks[False] + self.ghost_masks[True]
+        police_frames = self.police_masks[False] + self.police_masks[True]
+        self.overlap_table = np.stack([
+            np.stack([pygame.surfarray.array_red(g.convolve(p).to_surface()) > 0 for p in police_frames])
+            for g in ghost_frames
+        ])
+        self.police_mask_size = police_frames[0].get_size()
+
+        n, p = num_envs, police_capacity
+        self.ghost_x = np.zeros(n)
+        self.ghost_y = np.zeros(n)
+        self.ghost_facing_left = np.zeros(n, dtype=bool)
+        self.ghost_frame = np.zeros(n, dtype=np.int64)
+        self.ghost_animation_timer = np.zeros(n)
+        self.elapsed = np.zeros(n)
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.night = np.zeros(n, dtype=bool)
+        self.duration_morning = np.zeros(n, dtype=np.int64)
+        self.duration_night = np.zeros(n, dtype=np.int64)
+        self.next_acceleration = np.zeros(n)
+        self.phase_start = np.zeros(n)
+        self.transition_start = np.zeros(n)
+        self.transitioning = np.zeros(n, dtype=bool)
+        self.transition_queued = np.zeros(n, dtype=bool)
+        self.next_spawn = np.zeros(n)  # 白天到时的一波挂起期间为inf
+        self.spawn_pending = np.zeros(n, dtype=bool)
+        self.base_speed = np.zeros(n, dtype=np.int64)
+        self.speed_timer = np.zeros(n)  # 累计的夜晚时间，与白天暂停的定时器等价
+        self.survival_time = np.zeros(n)
+        self.score = np.zeros(n)
+        self.box_x = np.zeros(n, dtype=np.int64)
+        self.box_y = np.zeros(n, dtype=np.int64)
+        self.box_spawn = np.zeros(n)
+        self.police_x = np.zeros((n, p))
+        self.police_y = np.zeros((n, p), dtype=np.int64)
+        self.police_speed = np.zeros((n, p), dtype=np.int64)
+        self.police_left = np.zeros((n, p), dtype=bool)  # True：向左移动（从右侧进入）
+        self.police_spawn_step = np.zeros((n, p), dtype=np.int64)
+        self.police_alive = np.zeros((n, p), dtype=bool)
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self.observe(), {}
+
+    def _reset_envs(self, mask):
+        self.ghost_x[mask], self.ghost_y[mask] = self.ghost_start
+        self.ghost_facing_left[mask] = False
+        self.ghost_frame[mask] = 0
+        self.ghost_animation_timer[mask] = 0
+        self.elapsed[mask] = 0
+        self.steps[mask] = 0
+        self.night[mask] = self.initial_night
+        self.duration_morning[mask], self.duration_night[mask] = self.initial_durations
+        for array in (self.phase_start, self.transition_start, self.speed_timer, self.survival_time, self.score):
+            array[mask] = 0
+        self.next_acceleration[mask] = self.acceleration_interval
+        self.transitioning[mask] = False
+        self.transition_queued[mask] = False
+        self.spawn_pending[mask] = False
+        self.next_spawn[mask] = self._spawn_gap(int(mask.sum()))
+        self.base_speed[mask] = self.initial_base_speed
+        self.police_alive[mask] = False
+        self._respawn_box(mask, 0)
+
+    def _spawn_gap(self, count):
+        return self.rng.integers(self.spawn_interval[0], self.spawn_interval[1], count, endpoint=True)
+
+    def _respawn_box(self, mask, time):
+        # time 为重新生成的时刻（标量或长度N的数组）
+        count = int(mask.sum())
+        if count:
+            self.box_x[mask] = self.rng.integers(*config.box_spawn_x, count, endpoint=True)
+            self.box_y[mask] = self.rng.integers(*config.box_spawn_y, count, endpoint=True)
+            self.box_spawn[mask] = np.broadcast_to(time, mask.shape)[mask]
+
+    def step(self, actions):
+        """actions 为长度N的整数数组；返回 (观测, 奖励, terminated, truncated, info)，结束的局自动重置"""
+        dt = FIXED_DT
+        rng = self.rng
+        actions = np.asarray(actions)
+        score_before = self.score.copy()
+
+        # 鬼魂移动（限制在屏幕内）
+        moving = actions != NOOP
+        distance = self.ghost_speed * dt / SPEED_UNIT_MS
+        self.ghost_x += np.where(actions == LEFT, -distance, np.where(actions == RIGHT, distance, 0))
+        self.ghost_y += np.where(actions == UP, -distance, np.where(actions == DOWN, distance, 0))
+        np.clip(self.ghost_x, 0, GHOST_MAX_X, out=self.ghost_x)
+        np.clip(self.ghost_y, 0, GHOST_MAX_Y, out=self.ghost_y)
+        # 左右移动切换动画方向，移动时播放动画（Ghost.update_animation）
+        self.ghost_facing_left[actions == LEFT] = True
+        self.ghost_facing_left[actions == RIGHT] = False
+        self.ghost_animation_timer[moving] += dt
+        advance = moving & (self.ghost_animation_timer >= self.ghost_animation_delay)
+        self.ghost_animation_timer[advance] = 0
+        self.ghost_frame[advance] = (self.ghost_frame[advance] + 1) % len(self.ghost_masks[False])
+        self.elapsed += dt
+        self.steps += 1
+
+        now = self.elapsed
+
+        # 昼夜加速（TimeStateManager.accelerate）
+        accelerate = now >= self.next_acceleration
+        if accelerate.any():
+            self.next_acceleration[accelerate] += self.acceleration_interval
+            for durations in (self.duration_morning, self.duration_night):
+                shrunk = (durations[accelerate] * self.acceleration_factor).astype(np.int64)
+                durations[accelerate] = np.maximum(self.min_duration, shrunk)
+
+        # 阶段到时开始过渡；过渡期间计时的是过渡结束后的那个阶段，到时则排队
+        timed_night = self.night ^ self.transitioning
+        phase_end = self.phase_start + np.where(timed_night, self.duration_night, self.duration_morning)
+        due = now >= phase_end
+        self.transition_queued |= due & self.transitioning
+        begin = due & ~self.transitioning
+        self.phase_start[begin] = phase_end[begin]
+        self.transition_start[begin] = phase_end[begin]
+        self.transitioning |= begin
+
+        # 闪烁三次（1250毫秒）后切换状态，排队的过渡紧接着开始
+        finish_time = self.transition_start + TimeStateManager.BLINK_INTERVAL * (2 * TimeStateManager.TRANSITION_BLINKS - 1)
+        finished = self.transitioning & (now >= finish_time)
+        self.transitioning[finished] = False
+        self.night[finished] = ~self.night[finished]
+        requeued = finished & self.transition_queued
+        self.transition_queued[requeued] = False
+        self.phase_start[requeued] = finish_time[requeued]
+        self.transition_start[requeued] = finish_time[requeued]
+        self.transitioning |= requeued
+
+        # 夜晚成波刷新警察，白天到时的一波推迟到入夜；每局的新警察填进该局最前面的空位
+        spawn_due = now >= self.next_spawn
+        self.spawn_pending |= spawn_due & ~self.night
+        self.next_spawn[spawn_due & ~self.night] = np.inf
+        released = finished & self.night & self.spawn_pending
+        self.spawn_pending[released] = False
+        spawn = (spawn_due & self.night) | released
+        if spawn.any():
+            spawn_time = np.where(released, finish_time, self.next_spawn)
+            self.next_spawn[spawn] = spawn_time[spawn] + self._spawn_gap(int(spawn.sum()))
+            wave = np.zeros(self.num_envs, dtype=np.int64)
+            wave[spawn] = rng.integers(self.police_per_wave[0], self.police_per_wave[1], int(spawn.sum()),
+                                       endpoint=True)
+            free = ~self.police_alive
+            new = free & (np.cumsum(free, axis=1) <= wave[:, None])
+            count = int(new.sum())
+            left = rng.integers(0, 2, count).astype(bool)
+            self.police_left[new] = left
+            self.police_speed[new] = np.broadcast_to(self.base_speed[:, None], new.shape)[new] + rng.integers(0, config.speed_spread, count, endpoint=True)
+            self.police_x[new] = np.where(left, POLICE_MAX_X, POLICE_MIN_X)
+            self.police_y[new] = rng.integers(*config.police_spawn_y, count, endpoint=True)
+            self.police_spawn_step[new] = np.broadcast_to(self.steps[:, None], new.shape)[new]
+            self.police_alive |= new
+
+        # 警察移动和出界清理；新警察总是填进最前面的空位，活着的警察集中在前几列，只处理这几列
+        width = self._police_width()
+        police_x = self.police_x[:, :width]
+        police_distance = self.police_speed[:, :width] * dt / SPEED_UNIT_MS
+        police_x += np.where(self.police_left[:, :width], -police_distance, police_distance)
+        self.police_alive[:, :width] &= (police_x >= POLICE_MIN_X) & (police_x <= POLICE_MAX_X)
+
+        # 夜晚计分、警察加速
+        self.survival_time[self.night] += dt / 1000
+        self.score[self.night] += dt / 1000
+        self.speed_timer[self.night] += dt
+        faster = self.speed_timer >= self.speed_increase_interval
+        self.speed_timer[faster] -= self.speed_increase_interval
+        self.base_speed[faster] += self.speed_step
+
+        # 宝箱到时重新生成（从到期时刻重新计时）
+        expiry = self.box_spawn + self.box_time
+        self._respawn_box(now >= expiry, expiry)
+
+        # 碰撞：宝箱、白天移动、警察
+        ghost_left = self.ghost_x.astype(np.int64) + GHOST_COLLISION_OFFSET
+        ghost_top = self.ghost_y.astype(np.int64) + GHOST_COLLISION_OFFSET
+        collect = ((ghost_left < self.box_x + BOX_SIZE) & (self.box_x < ghost_left + GHOST_COLLISION_SIZE)
+                   & (ghost_top < self.box_y + BOX_SIZE) & (self.box_y < ghost_top + GHOST_COLLISION_SIZE))
+        self.score[collect] += config.box_points
+        self._respawn_box(collect, now)
+
+        discovered = ~self.night & moving
+        killed = self._police_hits(~discovered, width)
+        terminated = discovered | killed
+
+        reward = self.score - score_before
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        if self.max_time is not None:
+            truncated = ~terminated & (self.elapsed >= self.max_time)
+        done = terminated | truncated
+        info = {}
+        if done.any():
+            info = {
+                "done": done,
+                "final_score": np.where(done, self.score, 0.0),
+                "final_survival_time": np.where(done, self.survival_time, 0.0),
+                "discovered": discovered,
+                "killed": killed,
+            }
+            self._reset_envs(done)
+        return self.observe(), reward, terminated, truncated, info
+
+    def _police_width(self):
+        # 最后一个活着的警察所在的列数，之后的列全部为空
+        columns = np.flatnonzero(self.police_alive.any(axis=0))
+        return int(columns[-1]) + 1 if len(columns) else 0
+
+    def _police_hits(self, candidates, width):
+        # 粗筛：图像矩形相交，先用水平方向在 (N, width) 上筛出少数警察，再检查垂直方向
+        ghost_x = self.ghost_x.astype(np.int64)
+        ghost_y = self.ghost_y.astype(np.int64)
+        dx = self.police_x[:, :width].astype(np.int64) - ghost_x[:, None]
+        near = self.police_alive[:, :width] & (dx < GHOST_SIZE) & (dx > -POLICE_SIZE) & candidates[:, None]
+        envs, slots = np.nonzero(near)
+        dy = self.police_y[envs, slots] - ghost_y[envs]
+        hit = (dy < GHOST_SIZE) & (dy > -POLICE_SIZE)
+        envs, slots, offset_x, offset_y = envs[hit], slots[hit], dx[envs[hit], slots[hit]], dy[hit]
+        # 命中的 (局, 警察) 按当前帧查遮罩重叠表
+        ghost_frame = np.where(self.ghost_facing_left[envs], len(self.ghost_masks[False]), 0) + self.ghost_frame[envs]
+        police_left = self.police_left[envs, slots]
+        age = self.steps[envs] - self.police_spawn_step[envs, slots] + 1  # 出生那一步也更新了动画
+        frame_count = np.where(police_left, len(self.police_masks[True]), len(self.police_masks[False]))
+        police_frame = (np.where(police_left, len(self.police_masks[False]), 0)
+                        + age // self.police_frame_steps % frame_count)
+        mask_width, mask_height = self.police_mask_size
+        overlap = self.overlap_table[ghost_frame, police_frame, offset_x + mask_width - 1, offset_y + mask_height - 1]
+        killed = np.zeros(self.num_envs, dtype=bool)
+        killed[envs[overlap]] = True
+        return killed
+
+    def observe(self):
+        n = self.num_envs
+        duration = np.where(self.night, self.duration_night, self.duration_morning)
+        header = np.empty((n, len(OBSERVATION_FIELDS)), dtype=np.float32)
+        header[:, 0] = self.ghost_x / SCREEN_WIDTH
+        header[:, 1] = self.ghost_y / SCREEN_HEIGHT
+        header[:, 2] = self.night
+        header[:, 3] = self.transitioning
+        header[:, 4] = (self.elapsed - self.phase_start) / duration
+        header[:, 5] = self.box_x / SCREEN_WIDTH
+        header[:, 6] = self.box_y / SCREEN_HEIGHT
+        header[:, 7] = np.maximum(0, self.box_time - (self.elapsed - self.box_spawn)) / self.box_time
+        header[:, 8] = self.base_speed / SPEED_SCALE
+        width = self._police_width()
+        velocity = np.where(self.police_left[:, :width], -self.police_speed[:, :width], self.police_speed[:, :width])
+        police = police_features(self.ghost_x, self.ghost_y, self.police_x[:, :width],
+                                 self.police_y[:, :width].astype(np.float64), velocity,
+                                 self.police_alive[:, :width], self.nearest_police)
+        return np.concatenate([header, police], axis=1)
@@ -0,0 +1,904 @@
+import pygame
+import random
+from enum import Enum
+
+from assets import sprite_cache, text_renderer, convert_image, square_mask, ValueLabel
+from render import DayNightCrossfade, SpriteBatch, LAYER_BANNER, LAYER_GHOST, LAYER_BOX, LAYER_POLICE, LAYER_HUD
+from config import config
+from profiler import frame_profiler
+from scheduler import Scheduler
+from spatial import BandIndex
+
+# 屏幕设置（游戏逻辑使用的坐标空间）。屏幕、尺寸和难度参数都来自 game_config.json（见 config.py），
+# 这里是常用项的模块级别名
+SCREEN_WIDTH = config.screen_width
+SCREEN_HEIGHT = config.screen_height
+
+# 颜色定义
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 120, 255)
+GRAY = (100, 100, 100)
+YELLOW = (255, 255, 0)
+
+# 尺寸设置
+GHOST_SIZE = config.ghost_size  # 鬼魂尺寸
+POLICE_SIZE = config.police_size  # 警察尺寸
+BOX_SIZE = config.box_size  # 宝箱尺寸
+COLLISION_RATIO = config.collision_ratio  # 宝箱拾取范围，以及没有图片时碰撞体相对于图像尺寸的比例
+POLICE_GRID_CELL = config.police_grid_cell  # 警察碰撞粗筛索引的水平带高度
+POLICE_INDEX_MIN = 128  # 在场警察不超过这个数时直接逐个检查，索引查询的固定开销反而更大
+
+# 加载配置时算好的派生常量，每步都要用到的直接取模块变量
+GHOST_COLLISION_SIZE = config.ghost_collision_size
+GHOST_COLLISION_OFFSET = config.ghost_collision_offset  # 拾取矩形相对于图像左上角的偏移
+GHOST_MAX_X = config.ghost_max_x
+GHOST_MAX_Y = config.ghost_max_y
+POLICE_MIN_X, POLICE_MAX_X = config.police_x_range  # 警察的刷新位置，走出这个范围后销毁
+
+# 没有图片时的碰撞遮罩：居中的正方形，与原来的碰撞矩形一致
+GHOST_FALLBACK_MASK = square_mask(GHOST_SIZE, GHOST_COLLISION_SIZE)
+POLICE_FALLBACK_MASK = square_mask(POLICE_SIZE, config.police_collision_size)
+
+# 资源清单：资源包按这里的目标尺寸预先缩放（asset_pack.py）
+ASSET_MANIFEST = [
+    ("frames", "251019Halloween/image/Ghost/GhostLeft", config.ghost_sprite_size),
+    ("frames", "251019Halloween/image/Ghost/GhostRight", config.ghost_sprite_size),
+    ("frames", "251019Halloween/image/Police/PoliceLeft", config.police_sprite_size),
+    ("frames", "251019Halloween/image/Police/PoliceRight", config.police_sprite_size),
+    ("image", "251019Halloween/image/UI/Box.png", config.box_sprite_size, True),
+    ("image", "251019Halloween/image/Background/Morning.png", config.screen_size, False),
+    ("image", "251019Halloween/image/Background/Night.png", config.screen_size, False),
+]
+
+# 速度单位：每个60Hz参考帧（约16.7毫秒）移动的像素数，实际位移按dt缩放
+SPEED_UNIT_MS = 1000 / 60
+
+# 游戏状态枚举
+class GameScreen(Enum):
+    START = 1
+    PLAYING = 2
+    GAME_OVER = 3
+
+# 时间状态枚举
+class TimeState(Enum):
+    MORNING = 1
+    NIGHT = 2
+
+# 鬼魂类
+class Ghost:
+    __slots__ = (
+        "x", "y", "speed", "is_moving", "direction", "prev_x", "prev_y",
+        "images_left", "images_right", "current_images", "image_index",
+        "animation_timer", "animation_delay", "rect", "sprite_rect",
+        "masks_left", "masks_right", "current_masks",
+    )
+    
+    def __init__(self, x, y, speed):
+        self.speed = speed
+        
+        # 加载鬼魂图像
+        self.images_left = self.load_images("251019Halloween/image/Ghost/GhostLeft")
+        self.images_right = self.load_images("251019Halloween/image/Ghost/GhostRight")
+        # 每一帧的像素遮罩，与帧一起缓存，用于和警察的精确碰撞
+        self.masks_left = self.load_masks("251019Halloween/image/Ghost/GhostLeft")
+        self.masks_right = self.load_masks("251019Halloween/image/Ghost/GhostRight")
+        self.animation_delay = config.ghost_animation_ms  # 毫秒
+        
+        # 创建碰撞矩形（比图像小一点点），用于拾取宝箱
+        self.rect = pygame.Rect(0, 0, GHOST_COLLISION_SIZE, GHOST_COLLISION_SIZE)
+        # 整个图像的矩形：与警察碰撞的粗筛范围
+        self.sprite_rect = pygame.Rect(0, 0, GHOST_SIZE, GHOST_SIZE)
+        self.reset(x, y)
+        
+    def reset(self, x, y):
+        # 回到初始位置和朝向（重新开始游戏时复用已加载的帧和遮罩）
+        self.x = x
+        self.y = y
+        self.is_moving = False
+        self.direction = "right"  # 默认方向
+        self.prev_x = x  # 上一个模拟步的位置，用于渲染插值
+        self.prev_y = y
+        self.current_images = self.images_right
+        self.current_masks = self.masks_right
+        self.image_index = 0
+        self.animation_timer = 0
+        self.rect.topleft = (x + GHOST_COLLISION_OFFSET, y + GHOST_COLLISION_OFFSET)
+        self.sprite_rect.topleft = (x, y)
+        
+    def load_images(self, folder_path):
+        # 从共享缓存获取帧列表（图集中的subsurface），不会重复解码
+        return sprite_cache.load_frames(folder_path, config.ghost_sprite_size)
+    
+    def load_masks(self, folder_path):
+        return sprite_cache.load_masks(folder_path, config.ghost_sprite_size)
+    
+    def get_mask(self):
+        # 当前动画帧的碰撞遮罩
+        if self.current_masks:
+            return self.current_masks[self.image_index]
+        return GHOST_FALLBACK_MASK
+        
+    def save_position(self):
+        # 在每个模拟步开始时记录位置，绘制时在两步之间插值
+        self.prev_x = self.x
+        self.prev_y = self.y
+        
+    def move(self, direction, dt=SPEED_UNIT_MS):
+        self.is_moving = True
+        self.direction = direction
+        
+        # 更新动画方向
+        if direction == "left":
+            self.current_images = self.images_left
+            self.current_masks = self.masks_left
+        elif direction == "right":
+            self.current_images = self.images_right
+            self.current_masks = self.masks_right
+        # 上下方向保持上一个水平方向的动画
+        
+        # 位移按实际经过的时间缩放，与帧率无关
+        distance = self.speed * dt / SPEED_UNIT_MS
+        if direction == "left":
+            self.x -= distance
+        elif direction == "right":
+            self.x += distance
+        elif direction == "up":
+            self.y -= distance
+        elif direction == "down":
+            self.y += distance
+            
+        # 限制在屏幕内
+        self.x = max(0, min(self.x, GHOST_MAX_X))
+        self.y = max(0, min(self.y, GHOST_MAX_Y))
+        
+        # 更新碰撞矩形位置（保持居中，偏移量在加载配置时已经算好）
+        x = int(self.x)
+        y = int(self.y)
+        self.rect.topleft = (x + GHOST_COLLISION_OFFSET, y + GHOST_COLLISION_OFFSET)
+        self.sprite_rect.topleft = (x, y)
+        
+    def stop_moving(self):
+        self.is_moving = False
+        
+    def update_animation(self, dt):
+        if self.is_moving:
+            self.animation_timer += dt
+            if self.animation_timer >= self.animation_delay:
+                self.animation_timer = 0
+                self.image_index = (self.image_index + 1) % len(self.current_images)
+        
+    def draw(self, batch, alpha=1.0):
+        # alpha为两次模拟步之间的插值比例
+        x = int(self.prev_x + (self.x - self.prev_x) * alpha)
+        y = int(self.prev_y + (self.y - self.prev_y) * alpha)
+        if self.current_images:
+            batch.add(LAYER_GHOST, self.current_images[self.image_index], (x, y))
+        else:
+            # 如果没有图片，使用默认图形
+            if self.direction == "left":
+                batch.add_rect(LAYER_GHOST, BLUE, (x, y, GHOST_SIZE, GHOST_SIZE))
+            elif self.direction == "right":
+                batch.add_rect(LAYER_GHOST, GREEN, (x, y, GHOST_SIZE, GHOST_SIZE))
+            else:
+                batch.add_rect(LAYER_GHOST, BLUE, (x, y, GHOST_SIZE, GHOST_SIZE))
+
+# 宝箱类
+class TreasureBox:
+    __slots__ = ("image", "x", "y", "rect", "spawn_time", "max_time", "rng", "scheduler", "expiry")
+    
+    def __init__(self, scheduler, rng=random):
+        self.scheduler = scheduler
+        self.rng = rng  # 随机数生成器（可注入带种子的实例，保证可复现）
+        # 加载宝箱图像
+        self.image = self.load_image("251019Halloween/image/UI/Box.png")
+        self.rect = pygame.Rect(0, 0, BOX_SIZE, BOX_SIZE)
+        self.max_time = config.box_time  # 默认5秒后自动重置
+        self.reset(rng)
+        
+    def reset(self, rng=random):
+        self.rng = rng
+        self.expiry = None  # 到时重置的定时器，在 start() 中注册
+        self.respawn()  # 初始生成宝箱
+        
+    def start(self):
+        self.expiry = self.scheduler.call_at(self.spawn_time + self.max_time, self.respawn)
+        
+    @property
+    def timer(self):
+        # 宝箱已经存在的时间
+        return self.scheduler.now - self.spawn_time
+        
+    def load_image(self, file_path):
+        # 宝箱图片与角色帧共用同一张图集
+        return sprite_cache.load_image(file_path, config.box_sprite_size)
+            
+    def respawn(self):
+        # 确保宝箱在屏幕内生成
+        self.x = self.rng.randint(*config.box_spawn_x)
+        self.y = self.rng.randint(*config.box_spawn_y)
+        self.rect.topleft = (self.x, self.y)  # 原地移动碰撞矩形，不重新创建
+        self.spawn_time = self.scheduler.now  # 重置计时器
+        # 超过最大时间后重新生成宝箱
+        if self.expiry is not None:
+            self.scheduler.reschedule(self.expiry, self.spawn_time + self.max_time)
+        
+    def draw(self, batch):
+        if self.image:
+            batch.add(LAYER_BOX, self.image, (self.x, self.y))
+            
+            # 绘制宝箱剩余时间指示器
+            time_left = max(0, self.max_time - self.timer)
+            progress = time_left / self.max_time
+            
+            # 绘制背景条
+            bar_width = BOX_SIZE
+            bar_height = 8
+            bar_x = self.x
+            bar_y = self.y - 15
+            
+            batch.add(LAYER_BOX, get_bar_strip(GRAY, bar_width, bar_height), (bar_x, bar_y))
+            
+            # 绘制进度条（纯色条只画前 progress_width 像素，与背景条同一批次绘制）
+            progress_width = int(bar_width * progress)
+            color = GREEN if progress > 0.5 else YELLOW if progress > 0.2 else RED
+            if progress_width > 0:
+                batch.add(LAYER_BOX, get_bar_strip(color, bar_width, bar_height), (bar_x, bar_y),
+                          (0, 0, progress_width, bar_height))
+
+
+# 进度条用的纯色条带，按 (颜色, 宽, 高) 缓存
+bar_strips = {}
+
+
+def get_bar_strip(color, width, height):
+    strip = bar_strips.get((color, width, height))
+    if strip is None:
+        strip = pygame.Surface((width, height))
+        strip.fill(color)
+        bar_strips[(color, width, height)] = strip
+    return strip
+
+# 时间状态类
+class TimeStateManager:
+    TRANSITION_BLINKS = 3  # 过渡期间文字闪烁的次数
+    BLINK_INTERVAL = 250  # 文字每250毫秒切换一次显示/隐藏
+    
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.listeners = []  # 状态切换时调用 listener(new_state)
+        
+        # 背景资源在第一次绘制时才加载，无界面模拟不需要它们
+        self.crossfade = None
+        self.reset()
+    
+    def reset(self):
+        # 恢复初始的昼夜状态和持续时间；已加载的背景和过渡表面保留
+        # 修改：初始状态改为夜晚
+        self.state = TimeState.NIGHT
+        self.durations = {
+            TimeState.MORNING: config.morning_ms,  # 默认3秒
+            TimeState.NIGHT: config.night_ms       # 默认8秒
+        }
+        self.acceleration_interval = config.acceleration_interval  # 默认每10秒加速一次
+        self.acceleration_factor = config.acceleration_factor  # 每次加速后持续时间乘以这个系数
+        self.min_duration = config.min_duration  # 持续时间下限
+        self.phase_start = 0  # 当前阶段开始的时刻（上一次过渡开始时）
+        self.transition_start = 0
+        self.is_transitioning = False
+        self.transition_queued = False  # 过渡期间下一阶段已经到时，等过渡结束后立即开始
+        self.blink_count = 0
+        self.text_visible = True
+        
+        # 定时器在 start() 中注册，此前可以修改上面的参数
+        self.phase_timer = None
+        self.blink_timer = None
+    
+    def start(self):
+        self.scheduler.call_every(self.acceleration_interval, self.accelerate)
+        self.schedule_transition()
+    
+    @property
+    def current_duration(self):
+        # 当前阶段已经经过的时间
+        return self.scheduler.now - self.phase_start
+    
+    @property
+    def transition_timer(self):
+        return self.scheduler.now - self.transition_start if self.is_transitioning else 0
+    
+    def load_backgrounds(self, size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        # 加载背景图片；size为渲染画布的尺寸。背景直接使用精灵缓存里的表面（显示格式），不再另外拷贝
+        morning = self.load_background("251019Halloween/image/Background/Morning.png", size, (200, 230, 255))
+        night = self.load_background("251019Halloween/image/Background/Night.png", size, (20, 20, 60))
+        
+        # 昼夜过渡引擎：稳定状态只做一次不透明绘制，只在淡入淡出期间混合
+        self.crossfade = DayNightCrossfade(morning, night)
+    
+    def load_background(self, file_path, size=(SCREEN_WIDTH, SCREEN_HEIGHT), fallback_color=BLACK):
+        """加载背景图片（不透明，经过精灵缓存，重新开始游戏时不再解码）；图片缺失时返回纯色表面"""
+        if tuple(size) == (SCREEN_WIDTH, SCREEN_HEIGHT):
+            img = sprite_cache.load_image(file_path, size, alpha=False)
+        else:
+            # 缩小的画布：从资源包里逻辑分辨率的背景缩放一次，缩放后缓存只保留画布尺寸的那份
+            img = sprite_cache.load_scaled_image(file_path, size, (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
+        if img is None:
+            img = convert_image(pygame.Surface(size), False)
+            img.fill(fallback_color)
+        return img
+    
+    def texture_bytes(self):
+        """背景和昼夜过渡表面占用的字节数（背景与精灵缓存共享，不额外占用）"""
+        return self.crossfade.bytes_held() if self.crossfade is not None else 0
+        
+    def accelerate(self):
+        # 缩短持续时间，但保持最小1秒；正在计时的阶段按新的持续时间重新安排
+        for state in self.durations:
+            self.durations[state] = max(self.min_duration, int(self.durations[state] * self.acceleration_factor))
+        self.schedule_transition()
+    
+    def schedule_transition(self):
+        # 过渡期间计时的是过渡结束后的那个阶段
+        state = self.state
+        if self.is_transitioning:
+            state = TimeState.MORNING if state == TimeState.NIGHT else TimeState.NIGHT
+        time = self.phase_start + self.durations[state]
+        if self.phase_timer is None:
+            self.phase_timer = self.scheduler.call_at(time, self.begin_transition)
+        else:
+            self.scheduler.reschedule(self.phase_timer, time)
+    
+    def begin_transition(self):
+        if self.is_transitioning:
+            self.transition_queued = True
+            return
+        now = self.scheduler.now
+        self.phase_start = now
+        self.transition_start = now
+        self.is_transitioning = True
+        self.blink_count = 0
+        self.text_visible = True
+        self.blink_timer = self.scheduler.call_every(self.BLINK_INTERVAL, self.blink)
+        self.schedule_transition()
+    
+    def blink(self):
+        self.text_visible = not self.text_visible
+        if not self.text_visible:  # 计算闪烁次数（每次从可见到不可见算一次）
+            self.blink_count += 1
+            # 三次闪烁后完成过渡
+            if self.blink_count >= self.TRANSITION_BLINKS:
+                self.finish_transition()
+    
+    def finish_transition(self):
+        self.scheduler.cancel(self.blink_timer)
+        self.is_transitioning = False
+        # 切换状态
+        if self.state == TimeState.MORNING:
+            self.state = TimeState.NIGHT
+        else:
+            self.state = TimeState.MORNING
+        for listener in self.listeners:
+            listener(self.state)
+        if self.transition_queued:
+            self.transition_queued = False
+            self.begin_transition()
+    
+    def get_background(self, size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        """返回当前稳定状态下的背景表面；过渡期间返回None（需要整屏重绘）"""
+        if self.is_transitioning:
+            return None
+        if self.crossfade is None or self.crossfade.size != tuple(size):
+            self.load_backgrounds(size)
+        if self.state == TimeState.MORNING:
+            return self.crossfade.morning
+        return self.crossfade.night
+    
+    def get_morning_alpha(self):
+        """白天背景覆盖在夜晚背景上的透明度（0为纯夜晚，255为纯白天）"""
+        if self.is_transitioning:
+            progress = min(1.0, self.transition_timer / 1000)
+            if self.state == TimeState.MORNING:
+                # 白天转夜晚，逐渐降低白天背景透明度
+                return int(255 * (1 - progress))
+            # 夜晚转白天，逐渐增加白天背景透明度
+            return int(255 * progress)
+        # 非过渡期，白天背景完全显示
+        return 255 if self.state == TimeState.MORNING else 0
+    
+    def draw_background(self, screen):
+        # 背景按目标画布的尺寸加载
+        if self.crossfade is None or self.crossfade.size != screen.get_size():
+            self.load_backgrounds(screen.get_size())
+        self.crossfade.draw(screen, self.get_morning_alpha())
+    
+    def draw_text(self, batch):
+        # 绘制状态文字（在背景之上）
+        if self.is_transitioning and not self.text_visible:
+            return  # 不绘制文字（实现闪烁效果）
+        else:
+            # 72号大字体，渲染结果由文字缓存复用
+            if self.state == TimeState.MORNING:
+                state_text = text_renderer.render("MORNING", WHITE, 72)
+            else:
+                state_text = text_renderer.render("NIGHT", WHITE, 72)
+                
+            # 在右上角绘制状态文字
+            batch.add(LAYER_BANNER, state_text, (SCREEN_WIDTH - state_text.get_width() - 20, 20))
+
+# 警察类
+class Police:
+    __slots__ = (
+        "direction", "speed", "images", "masks", "x", "y", "prev_x", "rect",
+        "to_destroy", "image_index", "animation_timer", "animation_delay",
+    )
+    
+    def __init__(self, direction, base_speed, rng=random):
+        # 整个图像的矩形：碰撞粗筛和空间哈希用，对象池复用时只移动它
+        self.rect = pygame.Rect(0, 0, POLICE_SIZE, POLICE_SIZE)
+        self.reset(direction, base_speed, rng)
+        
+    def reset(self, direction, base_speed, rng=random):
+        # 原地重新初始化（新建或从对象池取出时调用），随机数的调用顺序保持不变
+        self.direction = direction
+        
+        # 速度会随着游戏进行而加快
+        self.speed = rng.randint(base_speed, base_speed + config.speed_spread)
+        
+        # 加载警察图像
+        if direction == "left":
+            folder_path = "251019Halloween/image/Police/PoliceLeft"
+            self.x = POLICE_MAX_X  # 从右侧进入
+        else:  # right
+            folder_path = "251019Halloween/image/Police/PoliceRight"
+            self.x = POLICE_MIN_X  # 从左侧进入
+        self.images = self.load_images(folder_path)
+        self.masks = sprite_cache.load_masks(folder_path, config.police_sprite_size)
+            
+        self.y = rng.randint(*config.police_spawn_y)
+        self.prev_x = self.x  # 上一个模拟步的位置，用于渲染插值
+        self.rect.topleft = (self.x, self.y)
+        
+        self.to_destroy = False
+        self.image_index = 0
+        self.animation_timer = 0
+        self.animation_delay = config.police_animation_ms  # 毫秒
+        
+    def load_images(self, folder_path):
+        # 从共享缓存获取帧列表（图集中的subsurface），警察刷新时不再访问磁盘
+        return sprite_cache.load_frames(folder_path, config.police_sprite_size)
+        
+    def update(self, dt=SPEED_UNIT_MS):
+        # 位移按实际经过的时间缩放，与帧率无关
+        self.prev_x = self.x
+        distance = self.speed * dt / SPEED_UNIT_MS
+        if self.direction == "left":
+            self.x -= distance
+        else:
+            self.x += distance
+            
+        # 更新碰撞矩形位置
+        self.rect.x = int(self.x)
+        
+        # 更新动画
+        self.animation_timer += dt
+        if self.animation_timer >= self.animation_delay:
+            self.animation_timer = 0
+            if self.images:
+                self.image_index = (self.image_index + 1) % len(self.images)
+        
+        # 检查是否超出屏幕
+        if self.x < POLICE_MIN_X or self.x > POLICE_MAX_X:
+            self.to_destroy = True
+            
+    @property
+    def velocity(self):
+        # 每 SPEED_UNIT_MS 的水平位移，向左为负（碰撞索引按它预测位置）
+        return -self.speed if self.direction == "left" else self.speed
+    
+    def get_mask(self):
+        # 当前动画帧的碰撞遮罩
+        if self.masks:
+            return self.masks[self.image_index]
+        return POLICE_FALLBACK_MASK
+    
+    def draw(self, batch, alpha=1.0):
+        x = int(self.prev_x + (self.x - self.prev_x) * alpha)
+        if self.images:
+            batch.add(LAYER_POLICE, self.images[self.image_index], (x, self.y))
+        else:
+            # 如果没有图片，使用默认图形
+            batch.add_rect(LAYER_POLICE, RED, (x, self.y, POLICE_SIZE, POLICE_SIZE))
+
+# 警察对象池：被销毁的警察放回空闲列表，刷新时原地重新初始化，避免成批创建和丢弃对象
+class PolicePool:
+    def __init__(self):
+        self.free = []
+        self.in_use = 0
+        self.created = 0
+        self.high_water = 0  # 同时在场警察数量的最大值
+        
+    def acquire(self, direction, base_speed, rng=random):
+        if self.free:
+            police = self.free.pop()
+            police.reset(direction, base_speed, rng)
+        else:
+            police = Police(direction, base_speed, rng)
+            self.created += 1
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return police
+    
+    def release(self, police):
+        self.in_use -= 1
+        self.free.append(police)
+        
+    def stats(self):
+        return {
+            "in_use": self.in_use,
+            "free": len(self.free),
+            "created": self.created,
+            "high_water": self.high_water,
+        }
+
+# 游戏状态管理器
+class GameStateManager:
+    def __init__(self, time_manager, crowd_backend="objects", rng=random):
+        self.time_manager = time_manager
+        self.scheduler = time_manager.scheduler
+        self.police_list = []
+        self.police_pool = PolicePool()
+        # 碰撞检测的粗筛索引：警察的y坐标和速度不变，刷新时登记一次，移动时只推进索引的时钟
+        self.police_grid = BandIndex(POLICE_GRID_CELL, POLICE_SIZE, POLICE_SIZE)
+        
+        # "numpy" 后端：警察存放在结构数组里，police_list 保持为空（适合上千人的大规模警察潮）
+        self.police_crowd = None
+        if crowd_backend == "numpy":
+            from crowd import PoliceCrowd
+            self.police_crowd = PoliceCrowd(POLICE_FALLBACK_MASK, SPEED_UNIT_MS, RED)
+        elif crowd_backend != "objects":
+            raise ValueError(f"Unknown crowd backend: {crowd_backend}")
+        self.treasure_box = TreasureBox(self.scheduler, rng)  # 宝箱
+        time_manager.listeners.append(self.on_state_change)
+        
+        # 分数和生存时间标签，只在整数值变化时重新渲染
+        self.time_label = ValueLabel("Survival: {} sec", WHITE, 36)
+        self.score_label = ValueLabel("Score: {}", WHITE, 36)
+        self.init_state(rng)
+        
+    def reset(self, rng=random):
+        """重新开始一局：警察放回对象池，宝箱重新生成；图片、对象池和索引都保留"""
+        for police in self.police_list:
+            self.police_pool.release(police)
+        self.police_list.clear()
+        self.police_grid.clear()
+        if self.police_crowd is not None:
+            self.police_crowd.clear()
+        self.treasure_box.reset(rng)
+        self.init_state(rng)
+        
+    def init_state(self, rng):
+        # 一局开始时的分数、刷新状态和难度参数
+        self.rng = rng
+        self.game_over = False
+        self.survival_time = 0
+        self.score = 0  # 分数属性
+        self.last_spawn_time = 0
+        self.spawn_pending = False  # 白天到了刷新时间，等入夜后立即刷新
+        self.fail_reason = ""
+        self.police_base_speed = config.base_speed  # 警察基础速度，会随着游戏进行而增加
+        self.police_per_wave = (config.wave_min, config.wave_max)  # 每波警察数量范围
+        self.spawn_interval = (config.spawn_min, config.spawn_max)  # 两波警察之间的间隔范围（毫秒）
+        self.speed_increase_interval = config.speed_interval  # 默认每15秒（夜晚时间）增加一次速度
+        self.speed_step = config.speed_step  # 每次增加的基础速度
+        self.speed_timer = None  # 白天暂停的重复定时器，在 start() 中注册
+        
+    def start(self):
+        # 注册定时器：刷新警察、警察加速、宝箱重置
+        self.schedule_spawn()
+        self.speed_timer = self.scheduler.call_every(self.speed_increase_interval, self.increase_police_speed)
+        if self.time_manager.state != TimeState.NIGHT:
+            self.scheduler.pause(self.speed_timer)
+        self.treasure_box.start()
+    
+    def schedule_spawn(self):
+        # 每2-3秒生成一次，间隔在上一波刷新时只抽取一次
+        self.scheduler.call_at(self.last_spawn_time + self.rng.randint(*self.spawn_interval), self.on_spawn_timer)
+    
+    def on_spawn_timer(self):
+        # 只在夜晚生成警察，白天到时的一波推迟到入夜
+        if self.time_manager.state == TimeState.NIGHT:
+            self.spawn_police()
+        else:
+            self.spawn_pending = True
+    
+    def on_state_change(self, state):
+        if state == TimeState.NIGHT:
+            self.scheduler.resume(self.speed_timer)
+            if self.spawn_pending:
+                self.spawn_pending = False
+                self.spawn_police()
+        else:
+            self.scheduler.pause(self.speed_timer)
+    
+    def spawn_police(self):
+        rng = self.rng
+        self.last_spawn_time = self.scheduler.now
+        # 随机生成4-5个警察
+        for _ in range(rng.randint(*self.police_per_wave)):
+            # 警察从两侧随机刷新
+            direction = rng.choice(["left", "right"])
+            if self.police_crowd is not None:
+                self.police_crowd.spawn(direction, self.police_base_speed, rng)
+                continue
+            police = self.police_pool.acquire(direction, self.police_base_speed, rng)
+            self.police_list.append(police)
+            self.police_grid.insert(police, police.y, police.x, police.velocity)
+        self.schedule_spawn()
+    
+    def increase_police_speed(self):
+        self.police_base_speed += self.speed_step  # 增加基础速度
+    
+    def police_count(self):
+        if self.police_crowd is not None:
+            return len(self.police_crowd)
+        return len(self.police_list)
+    
+    def update_police(self, dt):
+        if self.police_crowd is not None:
+            self.police_crowd.update(dt)
+            return
+        
+        grid = self.police_grid
+        grid.advance(dt / SPEED_UNIT_MS)
+        police_list = self.police_list
+        alive = 0
+        for police in police_list:
+            police.update(dt)
+            if police.to_destroy:
+                # 超出屏幕的警察移出索引并放回对象池
+                grid.remove(police)
+                self.police_pool.release(police)
+            else:
+                police_list[alive] = police
+                alive += 1
+            
+        # 原地截断列表，不再每帧创建新列表
+        del police_list[alive:]
+    
+    def update_survival_time(self, dt):
+        # 只在夜晚累计生存时间和分数
+        if self.time_manager.state == TimeState.NIGHT and not self.game_over:
+            self.survival_time += dt / 1000  # 转换为秒
+            # 每秒加1分
+            self.score += dt / 1000
+    
+    def check_fail_conditions(self, ghost):
+        if self.game_over:
+            return
+            
+        # 条件1: 白天移动
+        if self.time_manager.state == TimeState.MORNING and ghost.is_moving:
+            self.game_over = True
+            self.fail_reason ="BE DISCOVERED"
+            return
+            
+        # 条件2: 与警察碰撞。图像矩形相交只是粗筛（索引只返回鬼魂附近的警察），
+        # 命中时再用两者当前帧的遮罩做像素级检测
+        sprite_rect = ghost.sprite_rect
+        if self.police_crowd is not None:
+            if self.police_crowd.collides(sprite_rect, ghost.get_mask()):
+                self.game_over = True
+                self.fail_reason = "YOU GET KILLED"
+            return
+        police_list = self.police_list
+        candidates = self.police_grid.query(sprite_rect) if len(police_list) > POLICE_INDEX_MIN else police_list
+        for police in candidates:
+            if sprite_rect.colliderect(police.rect):
+                offset = (police.rect.x - sprite_rect.x, police.rect.y - sprite_rect.y)
+                if ghost.get_mask().overlap(police.get_mask(), offset):
+                    self.game_over = True
+                    self.fail_reason =  "YOU GET KILLED"
+                    return
+    
+    def check_treasure_collection(self, ghost):
+        # 检查鬼魂是否收集到宝箱
+        if ghost.rect.colliderect(self.treasure_box.rect):
+            self.score += config.box_points  # 收集宝箱加分（默认5分）
+            self.treasure_box.respawn()  # 立即生成新宝箱
+    
+    def draw(self, batch, alpha=1.0):
+        # 绘制宝箱
+        self.treasure_box.draw(batch)
+        
+        # 绘制警察
+        for police in self.police_list:
+            police.draw(batch, alpha)
+        if self.police_crowd is not None:
+            self.police_crowd.draw(batch, alpha)
+            
+        # 绘制生存时间和分数
+        time_text = self.time_label.get_surface(self.survival_time)
+        score_text = self.score_label.get_surface(self.score)
+        batch.add(LAYER_HUD, time_text, (SCREEN_WIDTH - 200, 100))
+        batch.add(LAYER_HUD, score_text, (20, 20))  # 在左上角显示分数
+        
+    def draw_game_over(self, screen):
+        # 绘制游戏结束画面（整屏覆盖，不进入批量绘制）；文字按画布比例直接用小号字体渲染
+        if self.game_over:
+            scale = screen.get_width() / SCREEN_WIDTH
+            width, height = screen.get_size()
+            
+            # 半透明覆盖层
+            overlay = pygame.Surface((width, height))
+            overlay.set_alpha(180)
+            overlay.fill(BLACK)
+            screen.blit(overlay, (0, 0))
+            
+            # 游戏结束文字
+            game_over_text = text_renderer.render("GAME OVER", RED, round(72 * scale))
+            reason_text = text_renderer.render(self.fail_reason, WHITE, round(48 * scale))
+            score_final_text = text_renderer.render(f"Final Score: {int(self.score)}", GREEN, round(48 * scale))
+            
+            screen.blit(game_over_text, (width//2 - game_over_text.get_width()//2, height//2 - int(80 * scale)))
+            screen.blit(reason_text, (width//2 - reason_text.get_width()//2, height//2))
+            screen.blit(score_final_text, (width//2 - score_final_text.get_width()//2, height//2 + int(60 * scale)))
+
+
+# 固定时间步长（毫秒），无界面模拟默认按60Hz推进
+FIXED_DT = 1000 / 60
+
+
+def read_controls(keys):
+    """把pygame按键状态转换为输入向量 (左, 右, 上, 下)"""
+    return (keys[pygame.K_LEFT], keys[pygame.K_RIGHT], keys[pygame.K_UP], keys[pygame.K_DOWN])
+
+
+def controls_to_direction(controls):
+    # 同时按下多个方向键时按 左 > 右 > 上 > 下 的优先级取一个
+    left, right, up, down = controls
+    if left:
+        return "left"
+    elif right:
+        return "right"
+    elif up:
+        return "up"
+    elif down:
+        return "down"
+    return None
+
+
+# 游戏模拟核心：不依赖显示窗口，用显式的dt和输入向量推进，绘制只是可选的消费者
+class GameSimulation:
+    def __init__(self, crowd_backend="objects", seed=None):
+        # 指定种子时使用独立的随机数生成器，同样的种子和输入序列得到完全相同的一局；
+        # 不指定时沿用全局 random 模块
+        self.seed = seed
+        self.rng = random.Random(seed) if seed is not None else random
+        self.ghost = Ghost(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, config.ghost_speed)
+        self.scheduler = Scheduler()  # 模拟时钟和所有定时事件
+        self.time_manager = TimeStateManager(self.scheduler)
+        self.game_manager = GameStateManager(self.time_manager, crowd_backend, self.rng)
+        self.started = False  # 定时器在第一步时注册，构造后修改的难度参数也能生效
+        self.game_over_screen = None  # 游戏结束画面的合成表面，重新开始时保留复用
+        self.game_over_composed = False
+        self.step_count = 0
+        self.sprite_batch = SpriteBatch()
+    
+    def reset(self, seed=None):
+        """重新开始一局，结果与 GameSimulation(crowd_backend, seed) 完全相同，
+        但保留已加载的图片、遮罩、背景、警察对象池和缓存表面"""
+        self.seed = seed
+        self.rng = random.Random(seed) if seed is not None else random
+        self.scheduler.reset()
+        self.ghost.reset(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+        self.time_manager.reset()
+        self.game_manager.reset(self.rng)
+        self.started = False
+        self.game_over_composed = False
+        self.step_count = 0
+    
+    @property
+    def elapsed_time(self):
+        # 模拟时钟（毫秒），代替 pygame.time.get_ticks()
+        return self.scheduler.now
+    
+    def start(self):
+        self.started = True
+        self.time_manager.start()
+        self.game_manager.start()
+        
+    @property
+    def game_over(self):
+        return self.game_manager.game_over
+    
+    def step(self, dt, controls=(False, False, False, False)):
+        """推进dt毫秒，controls为输入向量 (左, 右, 上, 下)；返回游戏是否已结束"""
+        self.ghost.stop_moving()
+        if self.game_manager.game_over:
+            return True
+        frame_profiler.begin("update")
+        self.update(dt, controls)
+        frame_profiler.end("update")
+        frame_profiler.begin("collision")
+        self.check_collisions()
+        frame_profiler.end("collision")
+        return self.game_manager.game_over
+    
+    def update(self, dt, controls):
+        # 移动、计时、刷新警察（不含碰撞检测）
+        ghost = self.ghost
+        game_manager = self.game_manager
+        ghost.save_position()
+        direction = controls_to_direction(controls)
+        if direction:
+            ghost.move(direction, dt)
+        
+        if not self.started:
+            self.start()
+        self.step_count += 1
+        ghost.update_animation(dt)
+        # 昼夜切换、刷新警察、警察加速、宝箱重置都由到期的定时事件触发
+        self.scheduler.advance(dt)
+        game_manager.update_police(dt)
+        game_manager.update_survival_time(dt)
+    
+    def check_collisions(self):
+        self.game_manager.check_treasure_collection(self.ghost)
+        self.game_manager.check_fail_conditions(self.ghost)
+    
+    def result(self):
+        game_manager = self.game_manager
+        return {
+            "survival_time": game_manager.survival_time,
+            "score": int(game_manager.score),
+            "fail_reason": game_manager.fail_reason,
+            "steps": self.step_count,
+        }
+    
+    def draw(self, screen, alpha=1.0):
+        if self.game_manager.game_over:
+            return self.draw_game_over_screen(screen)
+        frame_profiler.begin("background")
+        self.time_manager.draw_background(screen)
+        frame_profiler.end("background")
+        return self.draw_foreground(screen, alpha)
+    
+    def draw_foreground(self, screen, alpha=1.0):
+        # alpha为上一个模拟步到当前模拟步之间的插值比例；返回本次绘制的所有区域（供脏矩形渲染使用）。
+        # screen可以是比逻辑分辨率小的渲染画布，精灵按逻辑坐标提交、在批量绘制时换算
+        frame_profiler.begin("sprites")
+        batch = self.sprite_batch
+        batch.begin((0, 0, SCREEN_WIDTH, SCREEN_HEIGHT), screen.get_width() / SCREEN_WIDTH)
+        self.time_manager.draw_text(batch)
+        self.ghost.draw(batch, alpha)
+        self.game_manager.draw(batch, alpha)
+        rects = batch.flush(screen)
+        self.game_manager.draw_game_over(screen)
+        frame_profiler.end("sprites")
+        return rects
+    
+    def draw_game_over_screen(self, screen):
+        # 游戏结束后画面不再变化：最终画面、覆盖层和最终分数合成一次，之后每帧只blit一次
+        cached = self.game_over_screen
+        if cached is None or cached.get_size() != screen.get_size():
+            cached = self.game_over_screen = pygame.Surface(screen.get_size(), 0, screen)
+            self.game_over_composed = False
+        if not self.game_over_composed:
+            self.time_manager.draw_background(cached)
+            self.draw_foreground(cached)
+            self.game_over_composed = True
+        return [screen.blit(cached, (0, 0))]
+
+
+def run_headless(policy=None, max_time=600000, dt=FIXED_DT, crowd_backend="objects", seed=None):
+    """无界面运行一局游戏，policy(simulation) 返回输入向量；返回本局结果"""
+    simulation = GameSimulation(crowd_backend, seed)
+    idle = (False, False, False, False)
+    while simulation.elapsed_time < max_time:
+        controls = policy(simulation) if policy else idle
+        if simulation.step(dt, controls):
+            break
+    return simulation.result()
@@ -0,0 +1,141 @@
+import csv
+import json
+import time
+from collections import deque
+
+import pygame
+
+from assets import text_renderer
+
+GRAPH_BUDGET_MS = 33.3  # 帧时间曲线的满刻度（30FPS）
+OVERLAY_REFRESH_MS = 250  # 浮层文字刷新间隔，避免每帧重新渲染文字
+
+
+# 帧分析器：记录主循环各阶段耗时。未开启时每个计时点只是一次属性判断，开销接近于零
+class FrameProfiler:
+    def __init__(self, history=240):
+        self.enabled = False
+        self.overlay_visible = False
+        self.recording = False
+        self.frame_index = 0
+        self.frame_start = 0.0
+        self.stage_start = {}
+        self.stage_totals = {}  # 当前帧各阶段累计毫秒（一帧内可能多次进入同一阶段）
+        self.frame_times = deque(maxlen=history)
+        self.stage_history = {}  # stage -> deque of ms
+        self.history = history
+        self.events = []  # 导出用：(frame, stage, start_seconds, duration_seconds)
+        self.origin = time.perf_counter()
+
+        # 浮层缓存
+        self.panel = None
+        self.text_surfaces = []
+        self.text_age = OVERLAY_REFRESH_MS
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        self.enabled = self.overlay_visible or self.recording
+
+    def start_recording(self):
+        self.recording = True
+        self.enabled = True
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = time.perf_counter()
+        self.stage_totals = {}
+
+    def begin(self, stage):
+        if self.enabled:
+            self.stage_start[stage] = time.perf_counter()
+
+    def end(self, stage):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        start = self.stage_start.pop(stage, now)
+        self.stage_totals[stage] = self.stage_totals.get(stage, 0.0) + (now - start) * 1000
+        if self.recording:
+            self.events.append((self.frame_index, stage, start - self.origin, now - start))
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        frame_ms = (now - self.frame_start) * 1000
+        self.frame_times.append(frame_ms)
+        for stage, ms in self.stage_totals.items():
+            history = self.stage_history.get(stage)
+            if history is None:
+                history = self.stage_history[stage] = deque(maxlen=self.history)
+            history.append(ms)
+        if self.recording:
+            self.events.append((self.frame_index, "frame", self.frame_start - self.origin, now - self.frame_start))
+        self.frame_index += 1
+        self.text_age += frame_ms
+
+    def stage_averages(self):
+        return {stage: sum(values) / len(values) for stage, values in self.stage_history.items() if values}
+
+    def export(self, path):
+        """按扩展名导出：.csv 为逐帧逐阶段表格，其它为 Chrome trace（chrome://tracing 可直接打开）"""
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["frame", "stage", "start_ms", "duration_ms"])
+                for frame, stage, start, duration in self.events:
+                    writer.writerow([frame, stage, f"{start * 1000:.3f}", f"{duration * 1000:.3f}"])
+        else:
+            trace = [
+                {"name": stage, "cat": "frame", "ph": "X", "pid": 1, "tid": 1,
+                 "ts": start * 1e6, "dur": duration * 1e6, "args": {"frame": frame}}
+                for frame, stage, start, duration in self.events
+            ]
+            with open(path, "w") as f:
+                json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+    def draw_overlay(self, screen, stats):
+        """绘制分析浮层：帧时间曲线、各阶段平均耗时和调用方提供的统计数据；返回浮层占据的区域（供脏矩形渲染使用）"""
+        if not self.overlay_visible:
+            return None
+        width, height = 460, 420
+        x, y = 20, 70
+        if self.panel is None:
+            self.panel = pygame.Surface((width, height))
+            self.panel.set_alpha(190)
+            self.panel.fill((0, 0, 0))
+        drawn = [screen.blit(self.panel, (x, y))]
+
+        # 帧时间曲线
+        graph_height = 80
+        if len(self.frame_times) > 1:
+            step = width / self.history
+            points = [
+                (x + i * step, y + graph_height - min(graph_height, ms / GRAPH_BUDGET_MS * graph_height))
+                for i, ms in enumerate(self.frame_times)
+            ]
+            drawn.append(pygame.draw.lines(screen, (0, 255, 0), False, points))
+        budget_y = y + graph_height - int(16.7 / GRAPH_BUDGET_MS * graph_height)
+        drawn.append(pygame.draw.line(screen, (255, 255, 0), (x, budget_y), (x + width, budget_y)))
+
+        # 文字每隔一段时间才重新渲染
+        if self.text_age >= OVERLAY_REFRESH_MS:
+            self.text_age = 0
+            font = text_renderer.get_font(22)
+            lines = []
+            if self.frame_times:
+                frame_ms = sum(self.frame_times) / len(self.frame_times)
+                lines.append(f"frame {frame_ms:.2f} ms  ({1000 / max(frame_ms, 0.001):.0f} fps)")
+            for stage, ms in self.stage_averages().items():
+                lines.append(f"  {stage:<12} {ms:7.3f} ms")
+            for name, value in stats.items():
+                lines.append(f"{name}: {value}")
+            self.text_surfaces = [font.render(line, True, (255, 255, 255)) for line in lines]
+        for i, surface in enumerate(self.text_surfaces):
+            drawn.append(screen.blit(surface, (x + 10, y + graph_height + 10 + i * 20)))
+        return drawn[0].unionall(drawn[1:])
+
+
+# 进程级共享实例
+frame_profiler = FrameProfiler()
@@ -0,0 +1,263 @@
+import warnings
+import weakref
+
+import pygame
+from pygame._sdl2.video import Window
+
+CROSSFADE_SCALE = 0.5  # 过渡混合使用的分辨率比例
+CROSSFADE_LEVELS = 32  # 透明度量化级数，相同级别时复用上一次的混合结果
+
+# 画质预设：渲染画布相对于逻辑分辨率的比例
+QUALITY_PRESETS = {
+    "low": 0.5,
+    "medium": 0.75,
+    "native": 1.0,
+}
+
+
+# 虚拟分辨率画布：游戏逻辑仍使用逻辑坐标，绘制到按画质比例缩小的画布上。
+# 缩小画质时用 pygame.SCALED 打开窗口，画布就是显示表面，由SDL的硬件渲染器在GPU上放大到窗口，
+# 脏矩形照常只提交变化的区域。没有硬件渲染器时SDL的软件放大比 transform.scale 还慢，
+# 这时退回普通窗口，每帧在CPU上整体放大一次（只能整屏提交）。原生画质直接绘制在窗口上
+class RenderCanvas:
+    def __init__(self, size, scale=1.0):
+        self.scale = scale
+        self.window = None  # CPU放大时的窗口表面
+        if scale == 1.0:
+            self.surface = pygame.display.set_mode(size)
+            return
+        width, height = size
+        canvas_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            self.surface = pygame.display.set_mode(canvas_size, pygame.SCALED)
+        if not any("no fast renderer" in str(warning.message) for warning in caught):
+            # SCALED 按整数倍选择窗口大小，这里改回逻辑分辨率，窗口大小不随画质变化
+            Window.from_display_module().size = size
+            return
+        self.window = pygame.display.set_mode(size)
+        self.surface = pygame.Surface(canvas_size, 0, self.window)
+
+    @property
+    def upscale(self):
+        # 放大方式："gpu"（SCALED）、"cpu"（transform.scale）或 "none"（原生画质）
+        if self.scale == 1.0:
+            return "none"
+        return "cpu" if self.window is not None else "gpu"
+
+    def present(self, rects=None):
+        # rects为画布上变化的区域；CPU放大时整个画布每帧都重新放大，因此总是整屏提交
+        if self.window is not None:
+            pygame.transform.scale(self.surface, self.window.get_size(), self.window)
+            rects = None
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+
+# 脏矩形渲染器：每帧只用缓存的背景恢复上一帧画过的区域，再把变化区域提交给显示器
+class DirtyRectRenderer:
+    def __init__(self):
+        self.previous_rects = []  # 上一帧绘制过的区域
+        self.background = None  # 上一帧使用的背景
+        self.full_redraw = True
+        self.partial = False
+        self.updated_pixels = 0  # 最近一帧提交的像素数（用于观察填充率）
+        self.screen_pixels = 0  # 画布（或窗口）的像素数
+
+    def invalidate(self):
+        # 切换界面、重新开始等情况下，下一帧强制整屏重绘
+        self.full_redraw = True
+
+    def begin_frame(self, screen, background):
+        """恢复上一帧的绘制区域；返回False表示本帧需要调用方整屏重绘背景"""
+        # 过渡期间（没有稳定背景）或背景刚切换时整屏重绘
+        if background is None or background is not self.background or self.full_redraw:
+            self.background = background
+            self.full_redraw = False
+            self.partial = False
+            return False
+
+        for rect in self.previous_rects:
+            screen.blit(background, rect, rect)
+        self.partial = True
+        return True
+
+    def end_frame(self, rects, canvas=None):
+        # 忽略未绘制（None）或完全在屏幕外（面积为0）的区域；canvas为缩小的渲染画布时由它负责呈现
+        rects = [rect for rect in rects if rect]
+        width, height = (canvas.surface if canvas is not None else pygame.display.get_surface()).get_size()
+        self.screen_pixels = width * height
+        if self.partial:
+            dirty = self.previous_rects + rects
+            if canvas is not None:
+                canvas.present(dirty)
+            else:
+                pygame.display.update(dirty)
+            # CPU放大时画布总是整屏提交
+            full = canvas is not None and canvas.window is not None
+            self.updated_pixels = self.screen_pixels if full else sum(rect.width * rect.height for rect in dirty)
+        else:
+            if canvas is not None:
+                canvas.present()
+            else:
+                pygame.display.flip()
+            self.updated_pixels = self.screen_pixels
+        self.previous_rects = rects
+
+    def stats(self):
+        return {"updated_pixels": self.updated_pixels, "fill": self.updated_pixels / max(1, self.screen_pixels)}
+
+
+# 昼夜过渡：稳定状态只做一次不透明绘制；淡入淡出期间在低分辨率下混合后一次放大到屏幕
+class DayNightCrossfade:
+    def __init__(self, morning, night, scale=CROSSFADE_SCALE, levels=CROSSFADE_LEVELS):
+        self.morning = morning
+        self.night = night
+        self.size = morning.get_size()
+        self.levels = levels
+        
+        small_size = (max(1, int(self.size[0] * scale)), max(1, int(self.size[1] * scale)))
+        self.morning_small = scale_surface(morning, small_size)
+        self.night_small = scale_surface(night, small_size)
+        self.blend_surface = pygame.Surface(small_size, 0, morning)
+        self.blend_level = None
+
+    def surfaces(self):
+        return (self.morning, self.night, self.morning_small, self.night_small, self.blend_surface)
+
+    def bytes_held(self):
+        # 两张整屏背景（可能与精灵缓存共享）加上过渡用的三张小表面
+        return sum(surface.get_pitch() * surface.get_height() for surface in self.surfaces())
+
+    def draw(self, screen, alpha):
+        # alpha：白天背景覆盖在夜晚背景上的透明度
+        if alpha >= 255:
+            screen.blit(self.morning, (0, 0))
+            return
+        if alpha <= 0:
+            screen.blit(self.night, (0, 0))
+            return
+
+        level = max(1, alpha * self.levels // 255)
+        if level != self.blend_level:
+            self.blend_level = level
+            self.morning_small.set_alpha(level * 255 // self.levels)
+            self.blend_surface.blit(self.night_small, (0, 0))
+            self.blend_surface.blit(self.morning_small, (0, 0))
+
+        # 直接放大写入屏幕，省掉一次全屏blit
+        if screen.get_size() == self.size:
+            pygame.transform.scale(self.blend_surface, self.size, screen)
+        else:
+            screen.blit(pygame.transform.scale(self.blend_surface, self.size), (0, 0))
+
+
+def scale_rect(rect, scale):
+    # 逻辑坐标的矩形换算到画布上
+    x, y, width, height = rect
+    return pygame.Rect(int(x * scale), int(y * scale), round(width * scale), round(height * scale))
+
+
+def scale_surface(surface, size):
+    # smoothscale只支持24/32位表面，其它格式退回普通缩放
+    if surface.get_bitsize() in (24, 32):
+        return pygame.transform.smoothscale(surface, size)
+    return pygame.transform.scale(surface, size)
+
+
+# 绘制图层（按数值从小到大绘制，与原来的绘制顺序一致）
+LAYER_BANNER = 0  # 右上角的 MORNING / NIGHT 文字
+LAYER_GHOST = 1
+LAYER_BOX = 2  # 宝箱和倒计时条
+LAYER_POLICE = 3
+LAYER_HUD = 4  # 分数、生存时间
+
+
+# 精灵批量绘制：收集 (表面, 位置) 后每个图层只调用一次 screen.blits，完全在视口外的精灵直接跳过。
+# 位置和视口都是逻辑坐标；scale小于1时在提交前换算到缩小的画布上
+class SpriteBatch:
+    def __init__(self):
+        self.layers = {}  # layer -> [(surface, dest) 或 (surface, dest, area)]
+        self.fills = {}  # layer -> [(color, rect)]，没有图片时的默认图形
+        self.viewport = pygame.Rect(0, 0, 0, 0)
+        self.scale = 1.0
+        self.scaled = weakref.WeakKeyDictionary()  # 原始表面 -> 画布比例下的副本，原始表面释放后自动删除
+        self.sprites = 0
+        self.culled = 0
+        self.draw_calls = 0
+
+    def begin(self, viewport, scale=1.0):
+        for items in self.layers.values():
+            items.clear()
+        for items in self.fills.values():
+            items.clear()
+        self.viewport = pygame.Rect(viewport)
+        if scale != self.scale:
+            self.scale = scale
+            self.scaled.clear()
+        self.sprites = 0
+        self.culled = 0
+        self.draw_calls = 0
+
+    def add(self, layer, surface, dest, area=None):
+        # area 为源表面上的子区域（例如只画进度条的一部分）
+        if area is None:
+            width, height = surface.get_size()
+        else:
+            width, height = area[2], area[3]
+        x, y = dest
+        viewport = self.viewport
+        if (x >= viewport.right or y >= viewport.bottom
+                or x + width <= viewport.left or y + height <= viewport.top or width <= 0):
+            self.culled += 1
+            return
+        items = self.layers.get(layer)
+        if items is None:
+            items = self.layers[layer] = []
+        items.append((surface, dest) if area is None else (surface, dest, area))
+        self.sprites += 1
+
+    def add_rect(self, layer, color, rect):
+        rect = pygame.Rect(rect)
+        if not self.viewport.colliderect(rect):
+            self.culled += 1
+            return
+        self.fills.setdefault(layer, []).append((color, rect))
+        self.sprites += 1
+
+    def flush(self, screen):
+        """按图层顺序绘制全部精灵，返回实际绘制的区域（画布坐标）"""
+        rects = []
+        scale = self.scale
+        for layer in sorted(set(self.layers) | set(self.fills)):
+            for color, rect in self.fills.get(layer, ()):
+                if scale != 1.0:
+                    rect = scale_rect(rect, scale)
+                rects.append(screen.fill(color, rect))
+                self.draw_calls += 1
+            items = self.layers.get(layer)
+            if items:
+                if scale != 1.0:
+                    items = [self.scale_item(item) for item in items]
+                rects.extend(screen.blits(items))
+                self.draw_calls += 1
+        return rects
+
+    def scale_item(self, item):
+        # 精灵在第一次出现时缩放一次，之后复用缓存的副本
+        surface, (x, y) = item[0], item[1]
+        scale = self.scale
+        scaled = self.scaled.get(surface)
+        if scaled is None:
+            width, height = surface.get_size()
+            scaled = scale_surface(surface, (max(1, round(width * scale)), max(1, round(height * scale))))
+            self.scaled[surface] = scaled
+        dest = (int(x * scale), int(y * scale))
+        if len(item) == 2:
+            return scaled, dest
+        return scaled, dest, scale_rect(item[2], scale)
+
+    def stats(self):
+        return {"sprites": self.sprites, "culled": self.culled, "draw_calls": self.draw_calls}
@@ -0,0 +1,141 @@
+"""输入录制与回放：记录每个模拟步的方向键状态，配合随机种子逐位复现一局游戏
+
+文件格式（小端）：
+    头部   4s 魔数 "GSRP" | B 版本 | q 随机种子 | d 模拟步长（毫秒） | 8s 游戏配置指纹（GameConfig.digest）
+    数据   若干 (B 按键位掩码, H 连续步数) 的游程编码，静止或按住同一方向时只占3个字节
+
+用法: python replay.py RECORDING [--crowd-backend numpy] [--profile-output PATH]
+      无界面全速回放并输出本局结果；带画面的回放见主程序的 --replay 选项。
+"""
+import argparse
+import json
+import os
+import struct
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # 保持标准输出为纯JSON
+
+from config import config
+from game_core import FIXED_DT, GameSimulation
+from profiler import frame_profiler
+
+MAGIC = b"GSRP"
+# 2: 定时事件改为调度器触发；3: 与警察的碰撞改为像素级；4: 头部记录配置指纹。旧版本录像不能逐位复现
+VERSION = 4
+HEADER = struct.Struct("<4sBqd8s")
+RUN = struct.Struct("<BH")
+MAX_RUN = 0xFFFF
+
+
+def controls_to_mask(controls):
+    # 输入向量 (左, 右, 上, 下) -> 位掩码
+    mask = 0
+    for bit, pressed in enumerate(controls):
+        if pressed:
+            mask |= 1 << bit
+    return mask
+
+
+def mask_to_controls(mask):
+    return (bool(mask & 1), bool(mask & 2), bool(mask & 4), bool(mask & 8))
+
+
+# 录制器：主循环每调用一次 simulation.step 就记录一次输入
+class InputRecorder:
+    def __init__(self, seed, dt=FIXED_DT):
+        self.seed = seed
+        self.dt = dt
+        self.runs = []  # [位掩码, 连续步数]
+
+    def record(self, controls):
+        mask = controls_to_mask(controls)
+        runs = self.runs
+        if runs and runs[-1][0] == mask and runs[-1][1] < MAX_RUN:
+            runs[-1][1] += 1
+        else:
+            runs.append([mask, 1])
+
+    @property
+    def ticks(self):
+        return sum(count for _, count in self.runs)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.seed, self.dt, config.digest()))
+            f.write(b"".join(RUN.pack(mask, count) for mask, count in self.runs))
+
+
+# 加载好的录像
+class Recording:
+    def __init__(self, seed, dt, runs):
+        self.seed = seed
+        self.dt = dt
+        self.runs = runs
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise ValueError(f"Not a replay file: {path}")
+        magic, version, seed, dt, config_digest = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a replay file: {path}")
+        # 配置不同（尺寸、速度、时间参数）时同样的输入会得到另一局游戏
+        if config_digest != config.digest():
+            raise ValueError(f"{path} was recorded with a different game configuration "
+                             f"(current: {config.source})")
+        runs = [list(run) for run in RUN.iter_unpack(data[HEADER.size:])]
+        return cls(seed, dt, runs)
+
+    @property
+    def ticks(self):
+        return sum(count for _, count in self.runs)
+
+    def controls(self):
+        """按模拟步依次产生输入向量"""
+        for mask, count in self.runs:
+            controls = mask_to_controls(mask)
+            for _ in range(count):
+                yield controls
+
+    def create_simulation(self, crowd_backend="objects"):
+        return GameSimulation(crowd_backend, seed=self.seed)
+
+
+def replay_headless(recording, crowd_backend="objects"):
+    """不绘制、全速回放一局，返回本局结果"""
+    simulation = recording.create_simulation(crowd_backend)
+    for controls in recording.controls():
+        # 每个模拟步算作分析器的一帧，导出的数据可以按步号定位
+        frame_profiler.begin_frame()
+        game_over = simulation.step(recording.dt, controls)
+        frame_profiler.end_frame()
+        if game_over:
+            break
+    return simulation.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded game without a window")
+    parser.add_argument("recording")
+    parser.add_argument("--crowd-backend", default="objects", choices=("objects", "numpy"))
+    parser.add_argument("--profile-output", metavar="PATH",
+                        help="write per-step update/collision timings to PATH (.csv or Chrome trace)")
+    args = parser.parse_args()
+
+    try:
+        recording = Recording.load(args.recording)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    if args.profile_output:
+        frame_profiler.start_recording()
+    result = replay_headless(recording, args.crowd_backend)
+    if args.profile_output:
+        frame_profiler.export(args.profile_output)
+    result["seed"] = recording.seed
+    result["recorded_steps"] = recording.ticks
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
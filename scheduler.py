@@ -0,0 +1,89 @@
+import heapq
+
+
+# 定时器句柄：由Scheduler创建，用于取消、暂停和恢复
+class Timer:
+    __slots__ = ("time", "interval", "callback", "active", "seq", "remaining")
+
+    def __init__(self, time, interval, callback):
+        self.time = time  # 下一次触发的时刻（毫秒）
+        self.interval = interval  # 重复间隔，None表示只触发一次
+        self.callback = callback
+        self.active = True
+        self.seq = 0  # 对应的堆条目序号，旧条目在弹出时被跳过
+        self.remaining = None  # 暂停时距离触发还剩的时间
+
+
+# 基于最小堆的事件调度器：各系统注册一次性或重复定时器，每个模拟步只处理到期的事件。
+# 事件按触发时刻的先后处理，回调执行期间 now 等于该事件的准确触发时刻，
+# 所以在回调中安排的后续事件不受步长影响
+class Scheduler:
+    def __init__(self):
+        self.now = 0.0
+        self.queue = []  # (time, seq, timer)
+        self.counter = 0
+
+    def reset(self):
+        # 重新开始一局：时钟归零并丢弃所有事件
+        self.now = 0.0
+        self.queue.clear()
+        self.counter = 0
+
+    def call_at(self, time, callback, interval=None):
+        timer = Timer(time, interval, callback)
+        self._push(timer)
+        return timer
+
+    def call_later(self, delay, callback):
+        return self.call_at(self.now + delay, callback)
+
+    def call_every(self, interval, callback):
+        return self.call_at(self.now + interval, callback, interval)
+
+    def cancel(self, timer):
+        # 惰性删除：堆里的条目留到弹出时再丢弃
+        if timer is not None:
+            timer.active = False
+            timer.remaining = None
+
+    def reschedule(self, timer, time):
+        """把定时器改到新的触发时刻（已经触发过的一次性定时器也可以重新启用）"""
+        timer.time = time
+        timer.active = True
+        timer.remaining = None
+        self._push(timer)
+
+    def pause(self, timer):
+        if timer.active:
+            timer.remaining = timer.time - self.now
+            timer.active = False
+
+    def resume(self, timer):
+        if timer.remaining is not None:
+            self.reschedule(timer, self.now + timer.remaining)
+
+    def advance(self, dt):
+        """时间前进dt毫秒，按时间顺序触发期间到期的所有事件"""
+        target = self.now + dt
+        queue = self.queue
+        while queue and queue[0][0] <= target:
+            time, seq, timer = heapq.heappop(queue)
+            if not timer.active or timer.seq != seq:
+                continue
+            if time > self.now:  # 安排在过去的事件按当前时刻处理，时钟不倒退
+                self.now = time
+            if timer.interval is not None:
+                timer.time = self.now + timer.interval
+                self._push(timer)
+            else:
+                timer.active = False
+            timer.callback()
+        self.now = target
+
+    def __len__(self):
+        return sum(1 for _, seq, timer in self.queue if timer.active and timer.seq == seq)
+
+    def _push(self, timer):
+        self.counter += 1
+        timer.seq = self.counter
+        heapq.heappush(self.queue, (timer.time, self.counter, timer))
@@ -0,0 +1,75 @@
+from bisect import bisect_left, bisect_right
+
+X_MARGIN = 2  # 预测位置与逐步累加的实际位置之间的浮点误差，以及 rect.x 取整的余量（像素）
+
+
+# 警察碰撞粗筛索引：警察只沿水平方向匀速移动、y坐标和速度从不改变。
+# 按矩形顶边所在的水平带分组，带内再按速度分成车道；车道里的物体按"虚拟起点" x0 = x - 速度 * 时钟 排序，
+# x0 在移动过程中不变，所以登记一次之后每步只需推进时钟，不需要逐个维护。
+# 查询时每条车道用二分查找取出水平方向可能相交的一段，只返回鬼魂附近的少数物体
+class BandIndex:
+    def __init__(self, band_height, max_width, max_height):
+        self.band_height = band_height
+        self.max_width = max_width  # 登记物体的最大宽度和高度，决定查询时向左、向上多看多少
+        self.max_height = max_height
+        self.clock = 0.0  # 累计的移动时间（与速度相乘得到位移）
+        self.bands = {}  # band -> {速度: ([x0, ...], [obj, ...])}，两个列表按 x0 升序一一对应
+        self.entries = {}  # obj -> (band, 速度, x0)
+
+    def advance(self, time):
+        # 所有登记的物体都按各自的速度移动了 time
+        self.clock += time
+
+    def insert(self, obj, top, x, velocity):
+        """登记物体：矩形顶边、当前左边缘x和速度（每单位时间的水平位移，向左为负）"""
+        band = top // self.band_height
+        x0 = x - velocity * self.clock
+        self.entries[obj] = (band, velocity, x0)
+        lanes = self.bands.get(band)
+        if lanes is None:
+            lanes = self.bands[band] = {}
+        lane = lanes.get(velocity)
+        if lane is None:
+            lane = lanes[velocity] = ([], [])
+        xs, objs = lane
+        i = bisect_right(xs, x0)
+        xs.insert(i, x0)
+        objs.insert(i, obj)
+
+    def remove(self, obj):
+        entry = self.entries.pop(obj, None)
+        if entry is None:
+            return
+        band, velocity, x0 = entry
+        lanes = self.bands[band]
+        xs, objs = lanes[velocity]
+        i = bisect_left(xs, x0)
+        while objs[i] is not obj:  # x0 相同（同一步、同样速度刷新）的物体相邻
+            i += 1
+        del xs[i]
+        del objs[i]
+        if not objs:
+            del lanes[velocity]
+            if not lanes:
+                del self.bands[band]
+
+    def query(self, rect):
+        """返回矩形可能与rect相交的物体（只是粗筛，调用方仍需精确判断）"""
+        height = self.band_height
+        bands = self.bands
+        clock = self.clock
+        left = rect.left - self.max_width - X_MARGIN
+        right = rect.right + X_MARGIN
+        found = []
+        for band in range((rect.top - self.max_height + 1) // height, (rect.bottom - 1) // height + 1):
+            lanes = bands.get(band)
+            if lanes:
+                for velocity, (xs, objs) in lanes.items():
+                    offset = velocity * clock
+                    found.extend(objs[bisect_left(xs, left - offset):bisect_right(xs, right - offset)])
+        return found
+
+    def clear(self):
+        self.clock = 0.0
+        self.bands.clear()
+        self.entries.clear()
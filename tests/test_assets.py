@@ -0,0 +1,27 @@
+"""资源路径与工作目录无关：训练脚本、回放和平衡工具在仓库外启动时加载同样的精灵和遮罩"""
+import pytest
+
+from assets import list_image_files
+
+GHOST_FOLDER = "251019Halloween/image/Ghost/GhostRight"
+
+
+def test_sprite_folders_resolve_outside_repo(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    assert list_image_files(GHOST_FOLDER)
+
+
+def test_missing_sprite_folder_raises(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        list_image_files("251019Halloween/image/Missing")
+
+
+def test_vector_env_uses_sprite_masks_outside_repo(monkeypatch, tmp_path):
+    pytest.importorskip("numpy")
+    from env import VectorGhostSurvivalEnv
+
+    monkeypatch.chdir(tmp_path)
+    env = VectorGhostSurvivalEnv(2, seed=0)
+    assert len(env.ghost_masks[False]) == len(list_image_files(GHOST_FOLDER))
+    assert all(len(masks) > 1 for masks in env.police_masks.values())
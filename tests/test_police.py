@@ -0,0 +1,26 @@
+"""警察的刷新位置必须落在销毁范围内：两种后端刷新后都要走完整个屏幕才被移除"""
+import pytest
+
+from game_core import FIXED_DT, POLICE_FALLBACK_MASK, POLICE_MAX_X, POLICE_MIN_X, RED, SPEED_UNIT_MS, Police
+
+
+@pytest.mark.parametrize("direction", ["left", "right"])
+def test_police_survives_until_off_screen(direction):
+    police = Police(direction, 2)
+    steps = 0
+    while not police.to_destroy:
+        police.update(FIXED_DT)
+        steps += 1
+    # 从一侧屏幕外走到另一侧屏幕外，最少要走 屏幕宽度+警察宽度 的距离
+    assert steps * police.speed >= POLICE_MAX_X - POLICE_MIN_X
+
+
+def test_crowd_keeps_new_police_on_first_update():
+    pytest.importorskip("numpy")
+    from crowd import PoliceCrowd
+
+    crowd = PoliceCrowd(POLICE_FALLBACK_MASK, SPEED_UNIT_MS, RED)
+    crowd.spawn("left", 2)
+    crowd.spawn("right", 2)
+    crowd.update(FIXED_DT)
+    assert len(crowd) == 2
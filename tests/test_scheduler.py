@@ -0,0 +1,141 @@
+"""调度器和无界面 GameSimulation 的事件时刻测试（python -m pytest）"""
+import pytest
+
+from config import DEFAULT_CONFIG, config
+from game_core import FIXED_DT, GameSimulation, TimeState
+from scheduler import Scheduler
+
+# 模拟的期望时刻按 game_config.json 的默认值算出
+default_config = pytest.mark.skipif(config.source != DEFAULT_CONFIG, reason="expects the default game_config.json")
+NO_INPUT = (False, False, False, False)
+
+
+def record(scheduler, log, name):
+    return lambda: log.append((scheduler.now, name))
+
+
+def test_one_shot_and_repeating_fire_in_time_order():
+    scheduler = Scheduler()
+    log = []
+    scheduler.call_every(100, record(scheduler, log, "every"))
+    scheduler.call_at(250, record(scheduler, log, "once"))
+    scheduler.call_later(100, record(scheduler, log, "later"))
+    scheduler.advance(350)
+    # 同一时刻按注册顺序触发；重复定时器从触发时刻起算下一次
+    assert log == [(100, "every"), (100, "later"), (200, "every"), (250, "once"), (300, "every")]
+    assert scheduler.now == 350
+    assert len(scheduler) == 1
+
+
+def test_events_fire_at_exact_times_under_uneven_steps():
+    scheduler = Scheduler()
+    log = []
+    scheduler.call_every(40, record(scheduler, log, "tick"))
+    for dt in (7, 33, 1, 55, 24):
+        scheduler.advance(dt)
+    assert [time for time, _ in log] == [40, 80, 120]
+
+
+def test_cancel_drops_pending_event():
+    scheduler = Scheduler()
+    log = []
+    timer = scheduler.call_every(100, record(scheduler, log, "every"))
+    scheduler.advance(150)
+    scheduler.cancel(timer)
+    scheduler.advance(500)
+    assert log == [(100, "every")]
+    assert len(scheduler) == 0
+
+
+def test_pause_and_resume_keep_remaining_time():
+    scheduler = Scheduler()
+    log = []
+    timer = scheduler.call_later(1000, record(scheduler, log, "once"))
+    scheduler.advance(400)
+    scheduler.pause(timer)
+    scheduler.advance(5000)
+    assert log == []
+    scheduler.resume(timer)
+    scheduler.advance(599)
+    assert log == []
+    scheduler.advance(1)
+    assert log == [(6000, "once")]
+
+
+def test_reschedule_after_firing_reactivates_one_shot():
+    scheduler = Scheduler()
+    log = []
+    timer = scheduler.call_at(100, record(scheduler, log, "once"))
+    scheduler.advance(200)
+    assert not timer.active
+    scheduler.reschedule(timer, 300)
+    scheduler.advance(200)
+    assert log == [(100, "once"), (300, "once")]
+
+
+def test_reschedule_pending_timer_fires_once_at_new_time():
+    scheduler = Scheduler()
+    log = []
+    timer = scheduler.call_at(100, record(scheduler, log, "once"))
+    scheduler.reschedule(timer, 50)
+    scheduler.reschedule(timer, 150)
+    scheduler.advance(200)
+    assert log == [(150, "once")]
+
+
+def test_past_event_does_not_move_clock_backwards():
+    scheduler = Scheduler()
+    log = []
+    scheduler.advance(500)
+    scheduler.call_at(100, record(scheduler, log, "late"))
+    scheduler.advance(10)
+    assert log == [(500, "late")]
+    assert scheduler.now == 510
+
+
+def run_simulation(until):
+    """不做碰撞检测地推进一局新游戏，记录每次昼夜切换的时刻和新状态"""
+    simulation = GameSimulation(seed=1)
+    switches = []
+    simulation.time_manager.listeners.append(lambda state: switches.append((simulation.scheduler.now, state)))
+    while simulation.elapsed_time < until:
+        simulation.update(FIXED_DT, NO_INPUT)
+    return simulation, switches
+
+
+@default_config
+def test_simulation_day_night_switch_times():
+    _, switches = run_simulation(22000)
+    # 夜晚8秒后开始过渡，闪烁1250毫秒后切换；10秒和20秒时的加速缩短了正在计时的阶段
+    assert switches == [
+        (9250, TimeState.MORNING),
+        (11950, TimeState.NIGHT),
+        (19150, TimeState.MORNING),
+        (21580, TimeState.NIGHT),
+    ]
+
+
+@default_config
+def test_simulation_queues_transition_shorter_than_blink():
+    simulation, switches = run_simulation(112000)
+    # 白天缩到1秒后短于1250毫秒的过渡：阶段在过渡期间到时，排队的过渡在切换时立即开始
+    assert simulation.time_manager.durations[TimeState.MORNING] == config.min_duration
+    assert switches[-4:] == [
+        (106276, TimeState.MORNING),
+        (107526, TimeState.NIGHT),
+        (110313, TimeState.MORNING),
+        (111563, TimeState.NIGHT),
+    ]
+
+
+@default_config
+def test_simulation_floor_cycle():
+    simulation, switches = run_simulation(200000)
+    time_manager = simulation.time_manager
+    assert time_manager.durations == {TimeState.MORNING: config.min_duration, TimeState.NIGHT: config.min_duration}
+    # 两个阶段都到下限后，每次切换都紧接着开始下一次过渡，状态每1250毫秒交替一次
+    late = [(time, state) for time, state in switches if time >= 180423]
+    assert late[0][0] == 180423
+    assert [later - earlier for (earlier, _), (later, _) in zip(late, late[1:])] == [1250] * (len(late) - 1)
+    assert all(earlier != later for (_, earlier), (_, later) in zip(late, late[1:]))
+    assert time_manager.is_transitioning